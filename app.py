@@ -1,18 +1,38 @@
+import importlib
+import sys
+import time
+
 import streamlit as st
 
-# Importación de módulos
-# (Se asume que estos archivos existen: capitulo1.py, capitulo2.py, etc.)
-import capitulo1
-import capitulo2
-import capitulo3
-import capitulo4
-import capitulo5
-import capitulo6
-import capitulo7
-import capitulo8
-import capitulo9
-import capitulo10
-import capitulo11
+import imagenes
+import recursos
+
+# Registro de capítulos: entrada del menú → módulo. Cada módulo se importa
+# recién cuando se abre su capítulo (y queda en caché para los reruns), así
+# el arranque no paga scikit-learn, matplotlib, streamlit_webrtc, av, etc.
+CAPITULOS = {
+    "📘 Capítulo 1 — Geometric Transformations": "capitulo1",
+    "📗 Capítulo 2 — Edges & Filters": "capitulo2",
+    "📙 Capítulo 3 — Cartoonizing (Webcam/Photo)": "capitulo3",
+    "📕 Capítulo 4 — Body Parts": "capitulo4",
+    "📕 Capítulo 5 — Feature Extraction": "capitulo5",
+    "📒 Capítulo 6 — Seam Carving (Reducción de contenido)": "capitulo6",
+    "📔 Capítulo 7 — Detección y Aproximación de Contornos": "capitulo7",
+    "📓 Capítulo 8 — Seguimiento de Objetos por Color": "capitulo8",
+    "📚 Capítulo 9 — Reconocimiento de Objetos (ORB + BFMatcher)": "capitulo9",
+    "📖 Capítulo 10 — Realidad Aumentada con Cámara (Detección por color)": "capitulo10",
+    "📑 Capítulo 11 — Machine Learning (ANN) - Demo con Digits": "capitulo11",
+}
+
+
+def cargar_capitulo(opcion):
+    """Importa el módulo del capítulo; devuelve el módulo y los ms de la primera carga (o None)."""
+    nombre = CAPITULOS[opcion]
+    if nombre in sys.modules:
+        return sys.modules[nombre], None
+    inicio = time.perf_counter()
+    modulo = importlib.import_module(nombre)
+    return modulo, 1000 * (time.perf_counter() - inicio)
 
 # =====================================
 # CONFIGURACIÓN GENERAL
@@ -97,21 +117,22 @@ with st.sidebar:
     st.title("📚 Menú de capítulos")
     opcion = st.selectbox(
         "Selecciona un capítulo:",
-        [
-            "📘 Capítulo 1 — Geometric Transformations",
-            "📗 Capítulo 2 — Edges & Filters",
-            "📙 Capítulo 3 — Cartoonizing (Webcam/Photo)",
-            "📕 Capítulo 4 — Body Parts",
-            "📕 Capítulo 5 — Feature Extraction",
-            "📒 Capítulo 6 — Seam Carving (Reducción de contenido)",
-            "📔 Capítulo 7 — Detección y Aproximación de Contornos",
-            "📓 Capítulo 8 — Seguimiento de Objetos por Color",
-            "📚 Capítulo 9 — Reconocimiento de Objetos (ORB + BFMatcher)",
-            "📖 Capítulo 10 — Realidad Aumentada con Cámara (Detección por color)",
-            "📑 Capítulo 11 — Machine Learning (ANN) - Demo con Digits"
-        ]
+        list(CAPITULOS)
     )
 
+    # Detectores y cascadas se construyen una vez por proceso en segundo
+    # plano, mientras el usuario todavía está eligiendo capítulo
+    recursos.precalentar()
+    with st.expander("⚙️ Recursos de OpenCV"):
+        estado = recursos.estado_precarga()
+        st.caption("Precarga en curso…" if estado == "en curso" else f"Precarga completa en {estado:.0f} ms")
+        st.table([{"recurso": nombre, "instancias": stats["tamano"], "carga ms": round(stats["carga_ms"], 1)}
+                  for nombre, stats in recursos.stats_recursos().items()])
+        cache = imagenes.cache.stats()
+        st.caption(f"🖼️ Caché de imágenes: {cache['entradas']} imágenes, {cache['mb']:.0f}/"
+                   f"{cache['presupuesto_mb']:.0f} MB, {cache['aciertos']} aciertos, "
+                   f"{cache['fallos']} decodificaciones")
+
 # =====================================
 # DESCRIPCIÓN DE CADA CAPÍTULO
 # =====================================
@@ -317,28 +338,10 @@ else:
 # =====================================
 # RUTEO DE CAPÍTULOS
 # =====================================
-if opcion.startswith("📘 Capítulo 1"):
-    capitulo1.app()
-elif opcion.startswith("📗 Capítulo 2"):
-    capitulo2.app()
-elif opcion.startswith("📙 Capítulo 3"):
-    capitulo3.app()
-elif opcion.startswith("📕 Capítulo 4"):
-    capitulo4.app()
-elif opcion.startswith("📕 Capítulo 5"):
-    capitulo5.app()
-elif opcion.startswith("📒 Capítulo 6"):
-    capitulo6.app()
-elif opcion.startswith("📔 Capítulo 7"):
-    capitulo7.app()
-elif opcion.startswith("📓 Capítulo 8"):
-    capitulo8.app()
-elif opcion.startswith("📚 Capítulo 9"):
-    capitulo9.app()
-elif opcion.startswith("📖 Capítulo 10"):
-    capitulo10.app()
-elif opcion.startswith("📑 Capítulo 11"):
-    capitulo11.app()
+if opcion in CAPITULOS:
+    capitulo, carga_ms = cargar_capitulo(opcion)
+    if carga_ms is not None:
+        st.sidebar.caption(f"⏱️ Capítulo cargado en {carga_ms:.0f} ms")
+    capitulo.app()
 else:
     st.warning("⚠️ Selecciona un capítulo válido para comenzar.")
-
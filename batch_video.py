@@ -0,0 +1,186 @@
+"""
+Procesamiento por lotes (sin interfaz) de los métodos del Capítulo 8.
+
+Procesa archivos de video tan rápido como lo permita la CPU: sin pausas ni
+visualización, repartiendo los archivos entre un pool de procesos. Por cada
+video se crea una carpeta en ``--salida`` (con el nombre del archivo o, si
+dos videos se llaman igual, con su ruta: ``a/clip`` y ``b/clip``) con:
+
+- ``mascara.avi``: la máscara binaria de primer plano del método, cuadro a
+  cuadro (FFV1, sin pérdida).
+- ``resultados.csv``: por cuadro, tiempo, píxeles activos y fracción activa,
+  contados sobre esa misma máscara.
+
+Con ``--indice`` además se guarda, junto a cada video, su índice de movimiento
+(``<video>.motion.npz``, ver ``motion_index.py``).
+
+Uso:
+    python batch_video.py --metodo mog2 --salida resultados/ --procesos 4 videos/*.mp4
+"""
+import argparse
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+
+import capitulo8
+from motion_index import MotionIndexBuilder, ruta_indice
+from video_pipeline import FrameContext
+
+METODOS = {
+    "gmg": "Sustracción de Fondo (GMG)",
+    "mog2": "Sustracción de Fondo (MOG2)",
+    "color": "Detección de Color (Azul)",
+    "diferencia": "Diferencia de Cuadros (Movimiento)",
+}
+
+
+def validar_metodo(metodo):
+    """Falla antes de abrir ningún video si el método no se puede usar aquí."""
+    if metodo not in METODOS:
+        raise ValueError(f"Método desconocido: {metodo}")
+    if metodo == "gmg" and not hasattr(cv2, "bgsegm"):
+        raise ValueError("El método gmg necesita el módulo cv2.bgsegm, que solo trae "
+                         "opencv-contrib-python(-headless); usa mog2 o instala el paquete contrib.")
+
+
+def nombres_salida(rutas):
+    """
+    Carpeta de salida de cada video: el nombre del archivo o, si se repite,
+    su ruta relativa a la carpeta común de los videos. Falla si aun así dos
+    videos escribirían en la misma carpeta.
+    """
+    absolutas = [os.path.abspath(ruta) for ruta in rutas]
+    nombres = [os.path.splitext(os.path.basename(ruta))[0] for ruta in absolutas]
+    repetidos = {nombre for nombre in nombres if nombres.count(nombre) > 1}
+    if repetidos:
+        base = os.path.commonpath([os.path.dirname(ruta) for ruta in absolutas])
+        nombres = [os.path.splitext(os.path.relpath(ruta, base))[0] if nombre in repetidos else nombre
+                   for ruta, nombre in zip(absolutas, nombres)]
+    duplicados = sorted({nombre for nombre in nombres if nombres.count(nombre) > 1})
+    if duplicados:
+        raise ValueError("Varios videos escribirían en la misma carpeta de salida: "
+                         + ", ".join(duplicados))
+    return nombres
+
+
+def procesar_archivo(ruta, metodo, salida, escala=1.0, guardar_mascara=True, indexar=False,
+                     nombre=None):
+    """
+    Procesa un video completo y devuelve un resumen del trabajo. Los
+    resultados van a ``salida/nombre`` (por defecto, el nombre del archivo).
+    """
+    # Cada proceso del pool usa un solo hilo de OpenCV para no competir
+    cv2.setNumThreads(1)
+    nombre = nombre or os.path.splitext(os.path.basename(ruta))[0]
+    carpeta = os.path.join(salida, nombre)
+    os.makedirs(carpeta, exist_ok=True)
+
+    cap = cv2.VideoCapture(ruta)
+    if not cap.isOpened():
+        raise IOError(f"No se pudo abrir el video: {ruta}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    # Procesamiento síncrono: basta un único buffer de salida por nombre
+    ctx = FrameContext(n_salidas=1)
+    procesador = capitulo8.crear_procesador(METODOS[metodo], ctx=ctx)
+
+    indexador = MotionIndexBuilder(fps=fps, escala=escala) if indexar else None
+    frame = None
+    writer = None
+    indice = 0
+    inicio = time.perf_counter()
+    with open(os.path.join(carpeta, "resultados.csv"), "w", newline="") as f:
+        tabla = csv.writer(f)
+        tabla.writerow(["cuadro", "tiempo_ms", "pixeles_activos", "fraccion_activa"])
+        while True:
+            ret, frame = cap.read(frame)
+            if not ret:
+                break
+            tiempo_ms = cap.get(cv2.CAP_PROP_POS_MSEC)
+            entrada = frame
+            if escala != 1.0:
+                entrada = capitulo8.redimensionar(frame, escala, ctx)
+            resultado = procesador(entrada)
+            indice += 1
+            if resultado is None:
+                continue
+
+            # La misma máscara binaria que indexa la página (sin sombras ni ruido)
+            mascara = resultado[2]
+            activos = cv2.countNonZero(mascara)
+            tabla.writerow([indice - 1, f"{tiempo_ms:.1f}", activos,
+                            f"{activos / mascara.size:.6f}"])
+            if indexador is not None:
+                indexador.agregar(indice - 1, mascara)
+
+            if guardar_mascara:
+                if writer is None:
+                    h, w = mascara.shape
+                    writer = cv2.VideoWriter(os.path.join(carpeta, "mascara.avi"),
+                                             cv2.VideoWriter_fourcc(*"FFV1"), fps, (w, h),
+                                             isColor=False)
+                writer.write(mascara)
+
+    cap.release()
+    if writer is not None:
+        writer.release()
+    if indexador is not None:
+        indexador.construir().guardar(ruta_indice(ruta))
+    duracion = time.perf_counter() - inicio
+    return {"archivo": ruta, "cuadros": indice, "segundos": duracion,
+            "fps": indice / duracion if duracion > 0 else 0.0}
+
+
+def procesar_lote(rutas, metodo, salida, procesos=None, escala=1.0, guardar_mascara=True,
+                  indexar=False):
+    """Reparte los archivos entre ``procesos`` procesos y devuelve los resúmenes."""
+    validar_metodo(metodo)
+    nombres = nombres_salida(rutas)
+    resumenes = []
+    with ProcessPoolExecutor(max_workers=procesos) as pool:
+        futuros = {pool.submit(procesar_archivo, ruta, metodo, salida, escala, guardar_mascara,
+                               indexar, nombre): ruta
+                   for ruta, nombre in zip(rutas, nombres)}
+        for futuro in as_completed(futuros):
+            try:
+                resumen = futuro.result()
+            except Exception as exc:
+                print(f"❌ {futuros[futuro]}: {exc}")
+                continue
+            print(f"✅ {resumen['archivo']}: {resumen['cuadros']} cuadros en "
+                  f"{resumen['segundos']:.1f} s ({resumen['fps']:.0f} FPS)")
+            resumenes.append(resumen)
+    return resumenes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Procesa videos por lotes con los métodos del Capítulo 8.")
+    parser.add_argument("videos", nargs="+", help="Archivos de video a procesar")
+    parser.add_argument("--metodo", choices=sorted(METODOS), default="mog2")
+    parser.add_argument("--salida", default="resultados", help="Carpeta de salida")
+    parser.add_argument("--procesos", type=int, default=None,
+                        help="Procesos en paralelo (por defecto, uno por núcleo)")
+    parser.add_argument("--escala", type=float, default=1.0,
+                        help="Factor de escala aplicado a cada cuadro antes de procesarlo")
+    parser.add_argument("--sin-mascara", action="store_true",
+                        help="No guardar el video de máscaras, solo el CSV")
+    parser.add_argument("--indice", action="store_true",
+                        help="Guardar junto a cada video su índice de movimiento (.motion.npz)")
+    args = parser.parse_args(argv)
+
+    inicio = time.perf_counter()
+    try:
+        resumenes = procesar_lote(args.videos, args.metodo, args.salida, args.procesos,
+                                  args.escala, not args.sin_mascara, args.indice)
+    except ValueError as exc:
+        parser.error(str(exc))
+    total = sum(r["cuadros"] for r in resumenes)
+    duracion = time.perf_counter() - inicio
+    print(f"🏁 {len(resumenes)}/{len(args.videos)} videos, {total} cuadros en {duracion:.1f} s "
+          f"({total / duracion:.0f} FPS agregados)")
+
+
+if __name__ == "__main__":
+    main()
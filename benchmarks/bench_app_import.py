@@ -0,0 +1,79 @@
+"""
+Benchmark del arranque de ``app.py`` — costo de importar cada capítulo.
+
+Uso:
+    python benchmarks/bench_app_import.py
+
+Cada medición corre en un intérprete nuevo (sin caché de ``sys.modules``) y
+descuenta el tiempo base de ``import streamlit, cv2, numpy``, que paga
+cualquier página. Muestra lo que cuesta importar cada capítulo por separado,
+el total de importarlos todos (lo que hacía ``app.py`` antes de cargarlos a
+demanda) y, con ``-X importtime``, los paquetes más caros de cada uno.
+"""
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE = "import streamlit, cv2, numpy"
+CAPITULOS = [f"capitulo{i}" for i in range(1, 12)]
+
+
+def medir(modulos, repeticiones=3):
+    """
+    Mejor tiempo (ms) de importar ``modulos`` en un intérprete nuevo, ya con
+    la base importada. Devuelve None si alguno falla (dependencia ausente).
+    """
+    script = (f"{BASE}; import importlib, time; _t = time.perf_counter(); "
+              f"[importlib.import_module(m) for m in {modulos!r}]; "
+              f"print(1000 * (time.perf_counter() - _t))")
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, "-c", script], cwd=RAIZ, capture_output=True, text=True)
+        if salida.returncode != 0:
+            return None
+        mejor = min(mejor, float(salida.stdout.strip().splitlines()[-1]))
+    return mejor
+
+
+def paquetes_caros(modulo, n=3):
+    """Las ``n`` dependencias directas de ``modulo`` más caras según ``-X importtime``."""
+    salida = subprocess.run([sys.executable, "-X", "importtime", "-c", f"{BASE}; import {modulo}"],
+                            cwd=RAIZ, capture_output=True, text=True)
+    lineas = [linea[len("import time:"):].split("|") for linea in salida.stderr.splitlines()
+              if linea.startswith("import time:") and "cumulative" not in linea]
+    # importtime lista cada módulo después de sus dependencias: las directas
+    # del capítulo son las de un nivel de sangría justo antes de su línea
+    directas = []
+    for _, cumulativo, nombre in reversed(lineas):
+        nombre = nombre.rstrip()
+        if nombre.strip() == modulo and not directas:
+            directas.append(None)
+        elif directas:
+            if not nombre.startswith("   "):
+                break
+            if not nombre.startswith("     "):
+                directas.append((nombre.strip(), int(cumulativo) / 1000))
+    mas_caros = sorted(directas[1:], key=lambda par: -par[1])[:n]
+    return ", ".join(f"{nombre} {ms:.0f}" for nombre, ms in mas_caros)
+
+
+def main():
+    print(f"tiempos después de '{BASE}', mejor de 3 intérpretes nuevos\n")
+    print(f"{'capítulo':<11} {'import ms':>10}  dependencias más caras (ms)")
+    disponibles = []
+    for modulo in CAPITULOS:
+        ms = medir([modulo])
+        if ms is None:
+            print(f"{modulo:<11} {'—':>10}  no se pudo importar (¿falta una dependencia?)")
+            continue
+        disponibles.append(modulo)
+        print(f"{modulo:<11} {ms:>10.0f}  {paquetes_caros(modulo)}")
+
+    todos = medir(disponibles)
+    print(f"\narranque importando los {len(disponibles)} capítulos: {todos:.0f} ms")
+    print(f"arranque importando solo {CAPITULOS[0]}:   {medir(CAPITULOS[:1]):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
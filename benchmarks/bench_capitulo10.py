@@ -0,0 +1,121 @@
+"""
+Benchmark del Capítulo 10 — mezcla AR en el cuadro completo frente a la
+mezcla solo dentro de las cajas de los objetos azules.
+
+Uso:
+    python benchmarks/bench_capitulo10.py
+
+Genera cuadros 1080p sintéticos con objetos azules que ocupan distintas
+fracciones de la imagen, comprueba que ``MotorAR`` da exactamente el mismo
+resultado que la implementación original y compara sus tiempos. Después
+mide, sobre un clip con objetos en movimiento, el modo detectar-y-seguir con
+distintos intervalos de detección frente a detectar en cada cuadro.
+"""
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from capitulo10 import MotorAR  # noqa: E402
+
+
+def ar_cuadro_completo(frame, t, scaling_factor=0.6):
+    """Implementación original: copia y mezcla del cuadro completo."""
+    img = cv2.resize(frame, None, fx=scaling_factor, fy=scaling_factor)
+    hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    lower_blue = np.array([100, 120, 70])
+    upper_blue = np.array([140, 255, 255])
+    mask = cv2.inRange(hsv, lower_blue, upper_blue)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    overlay = img.copy()
+    for contour in contours:
+        if cv2.contourArea(contour) > 1000:
+            color = (int(128 + 127 * np.sin(t * 2)), int(128 + 127 * np.sin(t * 3)), 255)
+            cv2.drawContours(overlay, [contour], -1, color, -1)
+    alpha = 0.5
+    return cv2.addWeighted(overlay, alpha, img, 1 - alpha, 0)
+
+
+def cuadro_sintetico(radio, n_objetos=3, size=(1920, 1080), seed=0):
+    """Fondo con ruido (sin azul) y ``n_objetos`` círculos azules de radio ``radio``."""
+    rng = np.random.default_rng(seed)
+    w, h = size
+    frame = cv2.resize(rng.integers(0, 255, (h // 40, w // 40, 3), dtype=np.uint8), size,
+                       interpolation=cv2.INTER_CUBIC)
+    frame[..., 0] //= 3  # Fondo sin azul: solo los círculos pasan el umbral
+    for _ in range(n_objetos):
+        centro = (int(rng.integers(radio, w - radio)), int(rng.integers(radio, h - radio)))
+        cv2.circle(frame, centro, radio, (220, 60, 20), -1)
+    return frame
+
+
+def medir(funcion, repeticiones=30):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return 1000 * float(np.median(tiempos))
+
+
+def verificar_equivalencia():
+    motor = MotorAR()
+    for seed in range(20):
+        frame = cuadro_sintetico(radio=40 + 15 * seed, n_objetos=1 + seed % 5, seed=seed)
+        esperado = ar_cuadro_completo(frame, t=seed * 0.37)
+        obtenido = motor.procesar(frame, t=seed * 0.37)
+        assert np.array_equal(esperado, obtenido), f"Diferencia con seed={seed}"
+    print("✅ MotorAR coincide con la mezcla del cuadro completo")
+
+
+def bench_mezcla():
+    motor = MotorAR()
+    print(f"{'radio':>6} {'área azul':>10} {'completo ms':>12} {'ROI ms':>8} {'mejora':>7}")
+    for radio in (40, 80, 160, 320):
+        frame = cuadro_sintetico(radio)
+        mascara = cv2.inRange(cv2.cvtColor(frame, cv2.COLOR_BGR2HSV), (100, 120, 70), (140, 255, 255))
+        fraccion = cv2.countNonZero(mascara) / mascara.size
+        completo = medir(lambda: ar_cuadro_completo(frame, 1.0))
+        roi = medir(lambda: motor.procesar(frame, 1.0))
+        print(f"{radio:>6} {100 * fraccion:>9.1f}% {completo:>12.2f} {roi:>8.2f} {completo / roi:>6.2f}x")
+
+
+def clip_en_movimiento(n=120, size=(1920, 1080), seed=0):
+    """Tres círculos azules que se desplazan sobre un fondo sin azul."""
+    fondo = cuadro_sintetico(radio=1, n_objetos=0, size=size, seed=seed)
+    w, h = size
+    frames = []
+    for i in range(n):
+        frame = fondo.copy()
+        cv2.circle(frame, (200 + 8 * i, 300), 90, (220, 60, 20), -1)
+        cv2.circle(frame, (w - 300 - 5 * i, 700 + 2 * i), 120, (230, 80, 30), -1)
+        cv2.circle(frame, (900, 200 + 4 * i), 70, (210, 50, 10), -1)
+        frames.append(frame)
+    return frames
+
+
+def bench_seguimiento():
+    frames = clip_en_movimiento()
+    referencia = [ar_cuadro_completo(frame, 1.0) for frame in frames]
+    print(f"{'N':>4} {'ms/cuadro':>10} {'detecciones':>12} {'píxeles distintos':>18}")
+    for intervalo in (1, 5, 10, 30):
+        motor = MotorAR(intervalo_deteccion=intervalo)
+        tiempos, distintos = [], []
+        for frame, esperado in zip(frames, referencia):
+            inicio = time.perf_counter()
+            salida = motor.procesar(frame, 1.0)
+            tiempos.append(time.perf_counter() - inicio)
+            distintos.append(np.count_nonzero(np.any(salida != esperado, axis=2)) / salida[..., 0].size)
+        print(f"{intervalo:>4} {1000 * np.median(tiempos):>10.2f} {motor.detecciones:>12} "
+              f"{100 * np.mean(distintos):>17.3f}%")
+
+
+if __name__ == "__main__":
+    cv2.setNumThreads(1)
+    verificar_equivalencia()
+    bench_mezcla()
+    bench_seguimiento()
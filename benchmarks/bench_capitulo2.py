@@ -0,0 +1,89 @@
+"""
+Benchmark del Capítulo 2 — filtros con kernels.
+
+Uso:
+    python benchmarks/bench_capitulo2.py
+
+Compara, sobre una imagen sintética de 12 MP, el camino original (el kernel
+se arma en cada rerun y todo pasa por ``cv2.filter2D``; la viñeta arma una
+gaussiana de 2.25× el tamaño y multiplica canal por canal) con el registro
+``FILTROS`` y la máscara de viñeta cacheada. Reporta tiempos y la diferencia
+máxima entre ambos resultados.
+"""
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import capitulo2  # noqa: E402
+
+
+def kernels_originales():
+    """Los kernels como se construían en cada rerun."""
+    return {
+        "Filtro identidad": np.array([[0, 0, 0], [0, 1, 0], [0, 0, 0]]),
+        "Filtro promedio 3x3": np.ones((3, 3), np.float32) / 9,
+        "Filtro promedio 5x5": np.ones((5, 5), np.float32) / 25,
+        "Desenfoque por movimiento": capitulo2.kernel_movimiento(15),
+        "Enfocar imagen": np.array([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]]),
+        "Enfocado fuerte": np.array([[1, 1, 1], [1, -7, 1], [1, 1, 1]]),
+        "Realce de bordes": np.array([
+            [-1, -1, -1, -1, -1],
+            [-1, 2, 2, 2, -1],
+            [-1, 2, 8, 2, -1],
+            [-1, 2, 2, 2, -1],
+            [-1, -1, -1, -1, -1]
+        ]) / 8.0,
+    }
+
+
+def vineta_original(img):
+    rows, cols = img.shape[:2]
+    kernel_x = cv2.getGaussianKernel(int(1.5 * cols), 200)
+    kernel_y = cv2.getGaussianKernel(int(1.5 * rows), 200)
+    kernel = kernel_y * kernel_x.T
+    mask = 255 * kernel / np.linalg.norm(kernel)
+    mask = mask[int(0.5 * rows):, int(0.5 * cols):]
+    output = np.copy(img)
+    for i in range(3):
+        output[:, :, i] = cv2.multiply(output[:, :, i], mask.astype(output.dtype), scale=1/255)
+    return output
+
+
+def medir(funcion, repeticiones=5):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return 1000 * float(np.median(tiempos)), resultado
+
+
+def bench_filtros(size=(4000, 3000)):
+    rng = np.random.default_rng(0)
+    img = rng.integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)
+    print(f"{'filtro':<28} {'tipo':<10} {'original ms':>12} {'registro ms':>12} {'mejora':>7} {'dif':>4}")
+    for nombre, kernel in kernels_originales().items():
+        original, esperado = medir(lambda: cv2.filter2D(img, -1, kernel))
+        nuevo, obtenido = medir(lambda: capitulo2.FILTROS[nombre].aplicar(img))
+        diferencia = int(np.abs(esperado.astype(np.int16) - obtenido).max())
+        print(f"{nombre:<28} {capitulo2.FILTROS[nombre].tipo:<10} {original:>12.1f} {nuevo:>12.1f} "
+              f"{original / nuevo:>6.1f}x {diferencia:>4}")
+
+    original, esperado = medir(lambda: vineta_original(img))
+    capitulo2._vinetas.clear()
+    primera, _ = medir(lambda: capitulo2.aplicar_vineta(img), repeticiones=1)
+    nuevo, obtenido = medir(lambda: capitulo2.aplicar_vineta(img))
+    diferencia = int(np.abs(esperado.astype(np.int16) - obtenido).max())
+    print(f"{'Viñeta (primera vez)':<28} {'máscara':<10} {original:>12.1f} {primera:>12.1f} "
+          f"{original / primera:>6.1f}x {diferencia:>4}")
+    print(f"{'Viñeta (cacheada)':<28} {'máscara':<10} {original:>12.1f} {nuevo:>12.1f} "
+          f"{original / nuevo:>6.1f}x {diferencia:>4}")
+
+
+if __name__ == "__main__":
+    bench_filtros()
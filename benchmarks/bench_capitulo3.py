@@ -0,0 +1,84 @@
+"""
+Benchmark del Capítulo 3 — cartoonización en vivo con calidad adaptativa.
+
+Uso:
+    python benchmarks/bench_capitulo3.py
+
+Mide el costo por cuadro de cada nivel de ``NIVELES_CALIDAD`` sobre un
+cuadro sintético 720p y simula el stream con ``Cartoonizer`` para varios FPS
+objetivo: nivel en que se estabiliza el gobernador y tiempo por cuadro.
+
+Para fotos grandes compara ``cartoonize_image`` con ``cartoonize_tiled``
+(diferencia máxima y tiempo) con distintos números de hilos.
+"""
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import capitulo3  # noqa: E402
+
+
+def cuadro_sintetico(size=(1280, 720), seed=0):
+    rng = np.random.default_rng(seed)
+    w, h = size
+    img = cv2.resize(rng.integers(0, 255, (h // 20, w // 20, 3), dtype=np.uint8), size,
+                     interpolation=cv2.INTER_CUBIC)
+    cv2.circle(img, (w // 3, h // 2), h // 4, (40, 160, 220), -1)
+    cv2.rectangle(img, (w // 2, h // 4), (w - 100, h - 100), (200, 80, 60), -1)
+    return img
+
+
+def medir(funcion, repeticiones=10):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return 1000 * float(np.median(tiempos))
+
+
+def bench_niveles():
+    img = cuadro_sintetico()
+    print(f"{'nivel':>5} {'(rep, ds, median)':>18} {'ms':>7}")
+    for nivel, (rep, ds, median) in enumerate(capitulo3.NIVELES_CALIDAD):
+        ms = medir(lambda: capitulo3.cartoonize_image(img, num_repetitions=rep, ds_factor=ds,
+                                                      median_ksize=median))
+        print(f"{nivel:>5} {str((rep, ds, median)):>18} {ms:>7.1f}")
+
+
+def bench_gobernador(cuadros=90):
+    img = cuadro_sintetico()
+    print(f"{'FPS objetivo':>12} {'nivel final':>11} {'ms/cuadro final':>16}")
+    for target_fps in (5, 15, 30, 60):
+        cartoonizer = capitulo3.Cartoonizer(target_fps)
+        for _ in range(cuadros):
+            cartoonizer.procesar_imagen(img)
+        ms = medir(lambda: capitulo3.cartoonize_image(img, **cartoonizer.gobernador.parametros()))
+        print(f"{target_fps:>12} {cartoonizer.gobernador.nivel:>11} {ms:>16.1f}")
+
+
+def bench_bloques(size=(6000, 4000)):
+    img = cuadro_sintetico(size)
+    img = cv2.add(img, np.random.default_rng(1).integers(0, 40, img.shape, dtype=np.uint8))
+    print(f"{size[0] * size[1] / 1e6:.0f} MP, {os.cpu_count()} núcleos")
+    print(f"{'modo':<24} {'s':>7} {'dif. máx':>9}")
+    inicio = time.perf_counter()
+    referencia = capitulo3.cartoonize_image(img)
+    print(f"{'una pasada':<24} {time.perf_counter() - inicio:>7.2f} {0:>9}")
+    for workers in sorted({1, 2, os.cpu_count() or 1}):
+        inicio = time.perf_counter()
+        salida = capitulo3.cartoonize_tiled(img, workers=workers)
+        duracion = time.perf_counter() - inicio
+        diferencia = int(np.abs(salida.astype(np.int16) - referencia).max())
+        print(f"{f'bloques, {workers} hilos':<24} {duracion:>7.2f} {diferencia:>9}")
+
+
+if __name__ == "__main__":
+    bench_niveles()
+    bench_gobernador()
+    bench_bloques()
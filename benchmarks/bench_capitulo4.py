@@ -0,0 +1,135 @@
+"""
+Benchmark del Capítulo 4 — detección de caras en vivo.
+
+Uso:
+    python benchmarks/bench_capitulo4.py
+
+Compara el costo por cuadro de ``detect_faces`` (cascada sobre el cuadro
+completo en cada cuadro) con ``SeguidorCaras`` para varias combinaciones de
+intervalo de detección y escala, sobre un clip sintético 720p con texturas en
+movimiento. El clip no tiene caras reales: mide el costo de recorrer la
+cascada, que es lo que domina el tiempo por cuadro.
+
+También compara las cascadas de partes del rostro sobre el cuadro completo
+con ``detect_parts``, que solo las corre en subregiones de una cara dada, y
+mide cómo escala la detección con varios hilos (uno por espectador) usando
+un clasificador global protegido por un lock frente al pool por hilo, y
+cuánto le cuesta el primer cuadro a un pool vacío frente a uno precargado.
+"""
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import capitulo4  # noqa: E402
+from recursos import PoolRecursos, cargar_cascada  # noqa: E402
+
+
+def pool_nuevo():
+    """Pool vacío de la cascada de caras, fuera del registro del proceso."""
+    return PoolRecursos("cascada", partial(cargar_cascada, capitulo4.cascade_path))
+
+
+def clip_sintetico(n=60, size=(1280, 720), seed=0):
+    rng = np.random.default_rng(seed)
+    w, h = size
+    fondo = cv2.resize(rng.integers(0, 255, (h // 80, w // 80, 3), dtype=np.uint8), size,
+                       interpolation=cv2.INTER_CUBIC)
+    frames = []
+    for i in range(n):
+        frame = fondo.copy()
+        cv2.ellipse(frame, (300 + 6 * i, 360), (110, 150), 0, 0, 360, (150, 170, 210), -1)
+        frames.append(frame)
+    return frames
+
+
+def medir(procesar, frames):
+    tiempos = []
+    for frame in frames:
+        img = frame.copy() if frame is not None else None
+        inicio = time.perf_counter()
+        procesar(img)
+        tiempos.append(time.perf_counter() - inicio)
+    return 1000 * float(np.mean(tiempos)), 1000 * float(np.percentile(tiempos, 95))
+
+
+def bench_vivo():
+    frames = clip_sintetico()
+    print(f"{'modo':<28} {'media ms':>9} {'p95 ms':>8}")
+    media, p95 = medir(capitulo4.detect_faces, frames)
+    print(f"{'cuadro completo (original)':<28} {media:>9.2f} {p95:>8.2f}")
+    for intervalo, escala in ((1, 1.0), (1, 0.5), (5, 0.5), (10, 0.5), (5, 0.25)):
+        seguidor = capitulo4.SeguidorCaras(intervalo, escala)
+        media, p95 = medir(seguidor.procesar, frames)
+        print(f"{f'N={intervalo}, escala={escala}':<28} {media:>9.2f} {p95:>8.2f}")
+
+
+def bench_partes():
+    gray = cv2.cvtColor(clip_sintetico(n=1)[0], cv2.COLOR_BGR2GRAY)
+    cara = (200, 180, 220, 260)
+    print(f"{'parte':<20} {'cuadro completo ms':>19} {'región de la cara ms':>21}")
+    for nombre in capitulo4.PARTES:
+        with capitulo4.part_pools[nombre].prestar() as cascada:
+            completo, _ = medir(lambda _: cascada.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=3),
+                                [None] * 3)
+        region, _ = medir(lambda _: capitulo4.detect_parts(gray, [cara], [nombre]), [None] * 10)
+        print(f"{nombre:<20} {completo:>19.2f} {region:>21.2f}")
+
+
+def bench_hilos(cuadros_por_hilo=8):
+    gray = cv2.resize(cv2.cvtColor(clip_sintetico(n=1)[0], cv2.COLOR_BGR2GRAY), None, fx=0.5, fy=0.5)
+    compartida = cv2.CascadeClassifier(capitulo4.cascade_path)
+    lock = threading.Lock()
+
+    def con_lock():
+        for _ in range(cuadros_por_hilo):
+            with lock:
+                compartida.detectMultiScale(gray, scaleFactor=1.3, minNeighbors=3)
+
+    print(f"{'hilos':>6} {'lock global c/s':>16} {'pool c/s':>9} {'pool':>5} {'espera media ms':>16}")
+    for hilos in sorted({1, 2, 4, os.cpu_count() or 1}):
+        pool = pool_nuevo()
+
+        def con_pool():
+            for _ in range(cuadros_por_hilo):
+                with pool.prestar() as cascada:
+                    cascada.detectMultiScale(gray, scaleFactor=1.3, minNeighbors=3)
+
+        resultados = []
+        for trabajo in (con_lock, con_pool):
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(hilos) as ejecutor:
+                for futuro in [ejecutor.submit(trabajo) for _ in range(hilos)]:
+                    futuro.result()
+            resultados.append(hilos * cuadros_por_hilo / (time.perf_counter() - inicio))
+        stats = pool.stats()
+        print(f"{hilos:>6} {resultados[0]:>16.1f} {resultados[1]:>9.1f} {stats['tamano']:>5} "
+              f"{stats['espera_media_ms']:>16.3f}")
+
+
+def bench_precarga():
+    gray = cv2.resize(cv2.cvtColor(clip_sintetico(n=1)[0], cv2.COLOR_BGR2GRAY), None, fx=0.5, fy=0.5)
+    print(f"{'pool':<12} {'primer cuadro ms':>17}")
+    for nombre, precargar in (("vacío", False), ("precargado", True)):
+        pool = pool_nuevo()
+        if precargar:
+            pool.precalentar()
+        inicio = time.perf_counter()
+        with pool.prestar() as cascada:
+            cascada.detectMultiScale(gray, scaleFactor=1.3, minNeighbors=3)
+        print(f"{nombre:<12} {1000 * (time.perf_counter() - inicio):>17.2f}")
+
+
+if __name__ == "__main__":
+    cv2.setNumThreads(1)
+    bench_vivo()
+    bench_partes()
+    bench_hilos()
+    bench_precarga()
@@ -0,0 +1,139 @@
+"""
+Benchmark del Capítulo 6 — Seam Carving.
+
+Uso:
+    python benchmarks/bench_capitulo6.py
+
+Mide el tiempo por seam de ``find_vertical_seam`` en imágenes de 400, 1000
+y 2000 px de ancho y compara el modo exacto con el multirresolución y el
+modo por lotes. La equivalencia con la versión original basada en bucles de
+Python se comprueba en ``tests/test_capitulo6.py``.
+"""
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import capitulo6  # noqa: E402
+
+
+# ===============================
+# Utilidades
+# ===============================
+def imagen_sintetica(width, seed=0):
+    """Imagen suave con ruido y algunas figuras, proporción 3:4."""
+    rng = np.random.default_rng(seed)
+    height = width * 3 // 4
+    img = rng.integers(0, 255, (height // 8 + 1, width // 8 + 1, 3), dtype=np.uint8)
+    img = cv2.resize(img, (width, height), interpolation=cv2.INTER_CUBIC)
+    noise = rng.integers(0, 20, img.shape, dtype=np.uint8)
+    img = cv2.add(img, noise)
+    for _ in range(10):
+        center = tuple(int(v) for v in rng.integers(0, [width, height]))
+        cv2.circle(img, center, int(rng.integers(1, max(width // 10, 2))),
+                   tuple(int(v) for v in rng.integers(0, 255, 3)), -1)
+    return img
+
+
+def medir(fn, *args, repeticiones=3):
+    mejor = float('inf')
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        fn(*args)
+        mejor = min(mejor, time.perf_counter() - t0)
+    return mejor
+
+
+# ===============================
+# Benchmarks
+# ===============================
+def bench_find_vertical_seam(widths=(400, 1000, 2000)):
+    print("find_vertical_seam — tiempo por seam")
+    print(f"{'ancho':>6} {'alto':>6} {'vectorizado (ms)':>18}")
+    for width in widths:
+        img = imagen_sintetica(width)
+        energy = capitulo6.compute_energy_matrix(img)
+        t = medir(capitulo6.find_vertical_seam, energy)
+        print(f"{width:>6} {img.shape[0]:>6} {t * 1000:>18.2f}")
+
+
+def bench_energia(width=1000):
+    img = imagen_sintetica(width)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    energy = capitulo6.compute_energy_from_gray(gray)
+    seam = capitulo6.find_vertical_seam(energy)
+    reducida = capitulo6.remove_vertical_seam(img, seam)
+    t_full = medir(capitulo6.compute_energy_matrix, reducida)
+    t_inc = medir(capitulo6.update_energy_matrix, gray, energy, seam)
+    print(f"Energía tras un seam a {width} px: completa {t_full * 1000:.2f} ms, "
+          f"incremental {t_inc * 1000:.2f} ms")
+
+
+def bench_indice(width=200, max_seams=30):
+    img = imagen_sintetica(width, seed=2)
+    seam_order = capitulo6.build_seam_index(img, max_seams)
+    t = medir(capitulo6.apply_seam_index, img, seam_order, max_seams // 2)
+    print(f"Aplicar el índice de seams a {width} px: {t * 1000:.2f} ms")
+
+
+def bench_piramide(widths=(1000, 2000, 4000), num_seams=20):
+    """
+    Compara el modo exacto con el multirresolución: tiempo total y energía
+    media (de la imagen original) de los píxeles eliminados por seam.
+    """
+    print(f"Exacto vs multirresolución — {num_seams} seams")
+    print(f"{'ancho':>6} {'niveles':>8} {'exacto (s)':>11} {'pirámide (s)':>13} "
+          f"{'energía exacto':>15} {'energía pirámide':>17} {'diferencia':>11}")
+    for width in widths:
+        img = imagen_sintetica(width)
+        energy = capitulo6.compute_energy_matrix(img)
+        levels = capitulo6.pyramid_levels_for(width)
+        resultados = []
+        for niveles in (0, levels):
+            t0 = time.perf_counter()
+            seam_order = capitulo6.build_seam_index(img, num_seams, pyramid_levels=niveles)
+            t = time.perf_counter() - t0
+            coste = energy[seam_order < num_seams].sum() / num_seams
+            resultados.append((t, coste))
+        (t_ex, c_ex), (t_py, c_py) = resultados
+        print(f"{width:>6} {levels:>8} {t_ex:>11.2f} {t_py:>13.2f} "
+              f"{c_ex:>15.0f} {c_py:>17.0f} {100 * (c_py - c_ex) / c_ex:>10.1f}%")
+
+
+def bench_lotes(width=1000, num_seams=60, batch_sizes=(1, 2, 5, 10, 20)):
+    """Tiempo y energía eliminada del modo por lotes frente al secuencial."""
+    img = imagen_sintetica(width)
+    energy = capitulo6.compute_energy_matrix(img)
+    print(f"Por lotes — {num_seams} seams a {width} px")
+    print(f"{'K':>4} {'pasadas':>8} {'tiempo (s)':>11} {'energía':>10} {'vs secuencial':>14}")
+    secuencial = None
+    for k in batch_sizes:
+        t0 = time.perf_counter()
+        seam_order = capitulo6.build_seam_index(img, num_seams, batch_size=k)
+        t = time.perf_counter() - t0
+        coste = capitulo6.removed_energy(energy, seam_order, num_seams)
+        secuencial = secuencial or coste
+        print(f"{k:>4} {-(-num_seams // k):>8} {t:>11.2f} {coste:>10} "
+              f"{100 * (coste - secuencial) / secuencial:>13.1f}%")
+
+
+def bench_carve(width=1000, num_seams=50):
+    img = imagen_sintetica(width)
+    t0 = time.perf_counter()
+    capitulo6.carve_vertical_seams(img, num_seams)
+    t = time.perf_counter() - t0
+    print(f"carve_vertical_seams — {num_seams} seams a {width} px: "
+          f"{t:.2f} s ({t / num_seams * 1000:.1f} ms/seam)")
+
+
+if __name__ == "__main__":
+    bench_find_vertical_seam()
+    bench_energia()
+    bench_indice()
+    bench_carve()
+    bench_piramide()
+    bench_lotes()
@@ -0,0 +1,97 @@
+"""
+Benchmark del Capítulo 8 — lazo de procesamiento con y sin buffers reusados.
+
+Uso:
+    python benchmarks/bench_capitulo8.py
+
+Genera un clip sintético 1080p en memoria y compara, para la diferencia de
+cuadros, la detección de color y MOG2, el lazo original (OpenCV reserva cada
+salida) con el que usa ``FrameContext``: cuadros por segundo, latencia p50/p99
+por cuadro, memoria reservada y liberada en cada cuadro y memoria que queda
+residente en buffers (ambas medidas con tracemalloc).
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import capitulo8  # noqa: E402
+from video_pipeline import FrameContext  # noqa: E402
+
+METODOS = [
+    "Diferencia de Cuadros (Movimiento)",
+    "Detección de Color (Azul)",
+    "Sustracción de Fondo (MOG2)",
+]
+
+
+def clip_sintetico(n=90, size=(1920, 1080), seed=0):
+    """Fondo con ruido y dos figuras en movimiento (una azul)."""
+    rng = np.random.default_rng(seed)
+    w, h = size
+    fondo = cv2.resize(rng.integers(0, 255, (h // 40, w // 40, 3), dtype=np.uint8), size,
+                       interpolation=cv2.INTER_CUBIC)
+    frames = []
+    for i in range(n):
+        frame = fondo.copy()
+        cv2.circle(frame, (100 + 15 * i, h // 2), 120, (255, 60, 0), -1)
+        cv2.rectangle(frame, (w - 200 - 10 * i, 200), (w - 20 - 10 * i, 420), (0, 200, 255), -1)
+        frames.append(frame)
+    return frames
+
+
+def medir(metodo, frames, scaling_factor, usar_buffers):
+    ctx = FrameContext(n_salidas=1) if usar_buffers else None
+    procesador = capitulo8.crear_procesador(metodo, scaling_factor, ctx)
+    reduce_aparte = metodo != "Diferencia de Cuadros (Movimiento)"
+    latencias = []
+    transitorio = []
+
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    inicio = time.perf_counter()
+    for frame in frames:
+        antes, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        t0 = time.perf_counter()
+        if reduce_aparte:
+            if ctx is not None:
+                ctx.siguiente()
+            entrada = capitulo8.redimensionar(frame, scaling_factor, ctx)
+        else:
+            entrada = frame
+        procesador(entrada)
+        latencias.append(time.perf_counter() - t0)
+        _, pico = tracemalloc.get_traced_memory()
+        transitorio.append(pico - antes)
+    total = time.perf_counter() - inicio
+    residente, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # Se descartan los primeros cuadros (reserva inicial de los buffers)
+    latencias = np.array(latencias[10:]) * 1000
+    return (len(frames) / total, np.percentile(latencias, 50), np.percentile(latencias, 99),
+            np.mean(transitorio[10:]) / 2**20, (residente - base) / 2**20)
+
+
+def bench_buffers(scaling_factor=0.5):
+    frames = clip_sintetico()
+    print(f"Clip 1080p sintético, {len(frames)} cuadros, escala {scaling_factor}")
+    print(f"{'método':<36} {'modo':<10} {'FPS':>7} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'MB/cuadro':>10} {'residente MB':>13}")
+    for metodo in METODOS:
+        for usar_buffers in (False, True):
+            fps, p50, p99, churn, residente = medir(metodo, frames, scaling_factor, usar_buffers)
+            modo = "buffers" if usar_buffers else "original"
+            print(f"{metodo:<36} {modo:<10} {fps:>7.0f} {p50:>8.2f} {p99:>8.2f} "
+                  f"{churn:>10.2f} {residente:>13.1f}")
+
+
+if __name__ == "__main__":
+    bench_buffers()
+    bench_buffers(scaling_factor=1.0)
@@ -0,0 +1,104 @@
+"""
+Benchmark de la caché de imágenes subidas (``imagenes.py``).
+
+Uso:
+    python benchmarks/bench_imagenes.py
+
+Simula el costo de un rerun (mover un slider) en los capítulos que reciben
+una imagen: antes se leían los bytes, se decodificaba el JPEG y se convertía
+a RGB/gris en cada rerun; con la caché solo se calcula el hash de los bytes
+y se reutilizan las variantes ya calculadas. También muestra la expulsión
+por presupuesto de bytes con varias imágenes distintas.
+
+Por último compara la vista previa sobre el proxy (``ImagenDecodificada.proxy``)
+con el procesamiento a resolución completa en los capítulos 1 y 2: latencia
+por interacción y diferencia media (0-255) entre la vista previa y el
+resultado completo reducido al mismo tamaño.
+"""
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import capitulo1  # noqa: E402
+import capitulo2  # noqa: E402
+from imagenes import CacheImagenes  # noqa: E402
+
+
+def jpeg_sintetico(size, seed=0):
+    rng = np.random.default_rng(seed)
+    w, h = size
+    img = cv2.resize(rng.integers(0, 255, (h // 40, w // 40, 3), dtype=np.uint8), size,
+                     interpolation=cv2.INTER_CUBIC)
+    return cv2.imencode(".jpg", img, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+
+def medir(funcion, repeticiones=10):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return 1000 * float(np.median(tiempos))
+
+
+def rerun_original(datos):
+    img = cv2.imdecode(np.asarray(bytearray(datos), dtype=np.uint8), 1)
+    return cv2.cvtColor(img, cv2.COLOR_BGR2RGB), cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+
+def bench_rerun():
+    print(f"{'imagen':<14} {'JPEG MB':>8} {'original ms':>12} {'caché ms':>9} {'acelera':>8}")
+    for w, h in ((1280, 720), (1920, 1080), (4000, 3000)):
+        datos = jpeg_sintetico((w, h))
+        cache = CacheImagenes()
+
+        def rerun_cache():
+            imagen = cache.obtener(datos)
+            return imagen.vista(), imagen.gris
+
+        rerun_cache()  # primera subida: decodifica y calcula variantes
+        original, con_cache = medir(lambda: rerun_original(datos)), medir(rerun_cache)
+        print(f"{f'{w}x{h}':<14} {len(datos) / 2 ** 20:>8.2f} {original:>12.2f} {con_cache:>9.2f} "
+              f"{original / con_cache:>7.0f}x")
+
+
+def bench_presupuesto():
+    imagenes = [jpeg_sintetico((1920, 1080), seed) for seed in range(6)]
+    cache = CacheImagenes(presupuesto_bytes=32 * 2 ** 20)
+    for datos in imagenes + imagenes[-2:]:
+        imagen = cache.obtener(datos)
+        imagen.rgb, imagen.gris
+    print("presupuesto 32 MB, 6 imágenes 1080p y 2 repetidas:", cache.stats())
+
+
+def bench_proxy():
+    operaciones = {
+        "cap1 transformar": lambda img, f: capitulo1.transformar(img, 30, 0.8, 150, -80, f),
+        "cap2 promedio 5x5": lambda img, f: capitulo2.aplicar_filtro(img, "Filtro promedio 5x5", f),
+        "cap2 movimiento": lambda img, f: capitulo2.aplicar_filtro(img, "Desenfoque por movimiento", f),
+        "cap2 viñeta": lambda img, f: capitulo2.aplicar_filtro(img, "Viñeta", f),
+        "cap2 Canny": lambda img, f: capitulo2.detectar_bordes(cv2.cvtColor(img, cv2.COLOR_BGR2GRAY), "Canny"),
+    }
+    print(f"{'operación':<20} {'imagen':<10} {'completa ms':>12} {'proxy ms':>9} {'dif. media':>11}")
+    for w, h in ((1920, 1080), (4000, 3000), (6000, 4000)):
+        imagen = CacheImagenes().obtener(jpeg_sintetico((w, h)))
+        proxy, factor = imagen.proxy(), imagen.factor_proxy()
+        for nombre, operacion in operaciones.items():
+            completa = operacion(imagen.bgr, 1.0)
+            previa = operacion(proxy, factor)
+            reducida = cv2.resize(completa, previa.shape[1::-1], interpolation=cv2.INTER_AREA)
+            diferencia = float(np.mean(cv2.absdiff(previa, reducida)))
+            print(f"{nombre:<20} {f'{w}x{h}':<10} {medir(lambda: operacion(imagen.bgr, 1.0), 3):>12.2f} "
+                  f"{medir(lambda: operacion(proxy, factor)):>9.2f} {diferencia:>11.2f}")
+
+
+if __name__ == "__main__":
+    cv2.setNumThreads(1)
+    bench_rerun()
+    bench_presupuesto()
+    bench_proxy()
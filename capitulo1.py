@@ -1,53 +1,221 @@
 import streamlit as st
 import cv2
 import numpy as np
+from imagenes import cargar_imagen, descarga_resolucion_completa
+from video_pipeline import sin_medir
+
+
+# ======================================================
+# Cadena de transformaciones en una sola matriz 3×3
+# ======================================================
+class Transformacion:
+    """
+    Cadena componible de transformaciones geométricas. Cada paso multiplica
+    la matriz 3×3 acumulada, así que toda la cadena se aplica con un único
+    ``warpAffine`` (si sigue siendo afín) o ``warpPerspective``, y una sola
+    interpolación, en lugar de una deformación por paso::
+
+        T = Transformacion().rotar(30, (w / 2, h / 2)).trasladar(40, 0)
+        salida = T.aplicar(img)
+    """
+
+    def __init__(self, M=None):
+        self.M = np.eye(3) if M is None else np.asarray(M, np.float64)
+
+    def componer(self, M):
+        """Aplica ``M`` (2×3 o 3×3) después de los pasos anteriores."""
+        M = np.asarray(M, np.float64)
+        if M.shape == (2, 3):
+            M = np.vstack([M, [0, 0, 1]])
+        self.M = M @ self.M
+        return self
+
+    def rotar(self, grados, centro, escala=1.0):
+        return self.componer(cv2.getRotationMatrix2D(centro, grados, escala))
+
+    def escalar(self, sx, sy=None, centro=(0, 0)):
+        sy = sx if sy is None else sy
+        cx, cy = centro
+        return self.componer([[sx, 0, cx * (1 - sx)], [0, sy, cy * (1 - sy)]])
+
+    def trasladar(self, tx, ty):
+        return self.componer([[1, 0, tx], [0, 1, ty]])
+
+    def cizallar(self, shx, shy=0.0, centro=(0, 0)):
+        cx, cy = centro
+        return self.componer([[1, shx, -shx * cy], [shy, 1, -shy * cx]])
+
+    def perspectiva(self, px, py, tamano):
+        """
+        Efecto trapecio: ``px`` > 0 estrecha el borde superior (< 0 el
+        inferior) y ``py`` > 0 el izquierdo (< 0 el derecho), como fracción
+        del ancho / alto.
+        """
+        if px == 0 and py == 0:
+            return self
+        w, h = tamano
+        a, b = max(px, 0) * w / 2, max(-px, 0) * w / 2
+        c, d = max(py, 0) * h / 2, max(-py, 0) * h / 2
+        origen = np.float32([[0, 0], [w, 0], [w, h], [0, h]])
+        destino = np.float32([[a, c], [w - a, d], [w - b, h - d], [b, h - c]])
+        return self.componer(cv2.getPerspectiveTransform(origen, destino))
+
+    @property
+    def es_afin(self):
+        return np.array_equal(self.M[2], [0, 0, 1])
+
+    def aplicar(self, img, tamano=None):
+        """Una sola deformación de ``img`` al tamaño ``(w, h)`` (por defecto, el suyo)."""
+        tamano = tamano or img.shape[1::-1]
+        if self.es_afin:
+            return cv2.warpAffine(img, self.M[:2], tamano)
+        return cv2.warpPerspective(img, self.M, tamano)
+
+    def mapas(self, tamano):
+        """
+        Tablas de ``cv2.remap`` para la salida ``(w, h)``, en punto fijo
+        (``CV_16SC2`` + índices de interpolación), que es el formato más
+        rápido de aplicar cuadro a cuadro.
+        """
+        w, h = tamano
+        inversa = np.linalg.inv(self.M)
+        xs, ys = np.meshgrid(np.arange(w, dtype=np.float64), np.arange(h, dtype=np.float64))
+        x = inversa[0, 0] * xs + inversa[0, 1] * ys + inversa[0, 2]
+        y = inversa[1, 0] * xs + inversa[1, 1] * ys + inversa[1, 2]
+        if not self.es_afin:
+            z = inversa[2, 0] * xs + inversa[2, 1] * ys + inversa[2, 2]
+            detras = z <= 1e-9
+            z[detras] = 1
+            x, y = x / z, y / z
+            # Puntos detrás del plano de la cámara: fuera de la imagen
+            x[detras] = y[detras] = -1
+        return cv2.convertMaps(x.astype(np.float32), y.astype(np.float32), cv2.CV_16SC2)
+
+
+def cadena_transformacion(w, h, rotation=0, scale=1.0, tx=0, ty=0, shear=0.0,
+                          persp_x=0.0, persp_y=0.0, factor=1.0):
+    """
+    Cizalla y rotación + escala alrededor del centro, perspectiva y
+    traslación para una imagen de ``w``×``h``. ``tx``/``ty`` están en píxeles
+    de la imagen original: en un proxy reducido por ``factor`` se reescalan.
+    """
+    centro = (w // 2, h // 2)
+    return (Transformacion()
+            .cizallar(shear, centro=centro)
+            .rotar(rotation, centro, scale)
+            .perspectiva(persp_x, persp_y, (w, h))
+            .trasladar(tx * factor, ty * factor))
+
+
+def transformar(img, rotation=0, scale=1.0, tx=0, ty=0, factor=1.0, **pasos):
+    """Aplica ``cadena_transformacion`` a ``img`` con una sola deformación."""
+    (h, w) = img.shape[:2]
+    return cadena_transformacion(w, h, rotation, scale, tx, ty, factor=factor, **pasos).aplicar(img)
+
+
+# ======================================================
+# Corrección geométrica fija para video en vivo
+# ======================================================
+class CorrectorGeometrico:
+    """
+    Aplica la misma transformación a cada cuadro del stream con ``cv2.remap``.
+    Las tablas se calculan una vez por combinación de parámetros y tamaño de
+    cuadro; mientras no cambien, cada cuadro cuesta solo un ``remap``.
+    """
+
+    def __init__(self, parametros=None):
+        self.parametros = dict(parametros or {})
+        self.recalculos = 0
+        self._clave = None
+        self._mapas = None
+        self._salida = None
+
+    def procesar(self, img, etapa=sin_medir):
+        # La página puede reemplazar ``parametros`` en cualquier momento
+        parametros = self.parametros
+        h, w = img.shape[:2]
+        clave = (tuple(sorted(parametros.items())), w, h)
+        if clave != self._clave:
+            with etapa("tablas"):
+                self._mapas = cadena_transformacion(w, h, **parametros).mapas((w, h))
+            self._clave = clave
+            self.recalculos += 1
+
+        with etapa("remap"):
+            if self._salida is None or self._salida.shape != img.shape:
+                self._salida = np.empty_like(img)
+            return cv2.remap(img, *self._mapas, cv2.INTER_LINEAR, dst=self._salida)
+
+
+def controles_transformacion():
+    """Sliders de la cadena de transformación; devuelve los parámetros de ``cadena_transformacion``."""
+    # Explicación visual breve
+    with st.expander("ℹ️ ¿Qué hace cada control?"):
+        st.markdown("""
+        - **Rotación (°)** → Gira la imagen en sentido horario o antihorario.  
+          Ejemplo: valores positivos giran hacia la derecha, negativos hacia la izquierda.
+        - **Escala** → Aumenta (>1) o reduce (<1) el tamaño de la imagen.  
+          Ejemplo: 0.5 reduce a la mitad, 2.0 duplica el tamaño.
+        - **Desplazamiento horizontal (tx)** → Mueve la imagen hacia la derecha (positivo) o izquierda (negativo).  
+        - **Desplazamiento vertical (ty)** → Mueve la imagen hacia abajo (positivo) o hacia arriba (negativo).
+        - **Cizalla** → Inclina la imagen: las filas se desplazan según su altura.
+        - **Perspectiva** → Efecto trapecio: estrecha un borde como si la imagen se viera de costado.
+
+        Todos los pasos se combinan en **una sola matriz 3×3** y se aplican con una única deformación.
+        """)
+
+    # Sliders interactivos con descripciones visuales
+    return {
+        "rotation": st.slider("🔄 Rotación (grados)", -180, 180, 0, help="Gira la imagen en grados, en sentido horario o antihorario."),
+        "scale": st.slider("🔍 Escala", 0.1, 2.0, 1.0, help="Cambia el tamaño de la imagen. Menos de 1 la reduce, más de 1 la amplía."),
+        "tx": st.slider("↔️ Desplazamiento horizontal", -200, 200, 0, help="Mueve la imagen hacia los lados."),
+        "ty": st.slider("↕️ Desplazamiento vertical", -200, 200, 0, help="Mueve la imagen hacia arriba o abajo."),
+        "shear": st.slider("📐 Cizalla", -1.0, 1.0, 0.0, 0.05, help="Inclina la imagen hacia la derecha (positivo) o izquierda (negativo)."),
+        "persp_x": st.slider("🏛️ Perspectiva horizontal", -0.4, 0.4, 0.0, 0.01, help="Estrecha el borde superior (positivo) o el inferior (negativo)."),
+        "persp_y": st.slider("🏛️ Perspectiva vertical", -0.4, 0.4, 0.0, 0.01, help="Estrecha el borde izquierdo (positivo) o el derecho (negativo)."),
+    }
+
 
 def app():
     st.title("📘 Capítulo 1 — Transformaciones Geométricas")
 
+    fuente = st.radio("Selecciona la fuente:", ["📂 Subir imagen", "📹 Video en vivo (corrección fija)"],
+                      horizontal=True)
+
+    if fuente == "📹 Video en vivo (corrección fija)":
+        app_en_vivo()
+        return
+
     # Subida de imagen
     uploaded_file = st.file_uploader("📤 Sube una imagen", type=["jpg", "jpeg", "png"])
 
     if uploaded_file is not None:
-        # Convertir archivo a imagen de OpenCV
-        file_bytes = np.asarray(bytearray(uploaded_file.read()), dtype=np.uint8)
-        img = cv2.imdecode(file_bytes, 1)
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        st.image(img_rgb, caption="🖼️ Imagen original", use_container_width=True)
+        # Imagen de OpenCV decodificada una sola vez (se reutiliza en cada rerun)
+        imagen = cargar_imagen(uploaded_file)
+        img = imagen.bgr
+        st.image(imagen.vista(), caption="🖼️ Imagen original", use_container_width=True)
 
         st.divider()
         st.subheader("⚙️ Ajustes de transformación")
+        parametros = controles_transformacion()
 
-        # Explicación visual breve
-        with st.expander("ℹ️ ¿Qué hace cada control?"):
-            st.markdown("""
-            - **Rotación (°)** → Gira la imagen en sentido horario o antihorario.  
-              Ejemplo: valores positivos giran hacia la derecha, negativos hacia la izquierda.
-            - **Escala** → Aumenta (>1) o reduce (<1) el tamaño de la imagen.  
-              Ejemplo: 0.5 reduce a la mitad, 2.0 duplica el tamaño.
-            - **Desplazamiento horizontal (tx)** → Mueve la imagen hacia la derecha (positivo) o izquierda (negativo).  
-            - **Desplazamiento vertical (ty)** → Mueve la imagen hacia abajo (positivo) o hacia arriba (negativo).
-            """)
-
-        # Sliders interactivos con descripciones visuales
-        rotation = st.slider("🔄 Rotación (grados)", -180, 180, 0, help="Gira la imagen en grados, en sentido horario o antihorario.")
-        scale = st.slider("🔍 Escala", 0.1, 2.0, 1.0, help="Cambia el tamaño de la imagen. Menos de 1 la reduce, más de 1 la amplía.")
-        tx = st.slider("↔️ Desplazamiento horizontal", -200, 200, 0, help="Mueve la imagen hacia los lados.")
-        ty = st.slider("↕️ Desplazamiento vertical", -200, 200, 0, help="Mueve la imagen hacia arriba o abajo.")
-
-        # Matriz de rotación + escala
-        (h, w) = img.shape[:2]
-        M = cv2.getRotationMatrix2D((w // 2, h // 2), rotation, scale)
-
-        # Aplicar traslación
-        M[0, 2] += tx
-        M[1, 2] += ty
+        # La vista previa trabaja sobre un proxy del tamaño de pantalla: el
+        # costo de cada slider no depende del tamaño de la foto
+        vista_rapida = st.checkbox("⚡ Vista previa rápida (resolución de pantalla)", value=True,
+                                   help="Procesa una copia reducida mientras ajustas los controles. "
+                                        "La resolución completa se procesa solo al descargar.")
+        if vista_rapida:
+            base, factor = imagen.proxy(), imagen.factor_proxy()
+        else:
+            base, factor = img, 1.0
 
         # Transformar la imagen
-        transformed = cv2.warpAffine(img, M, (w, h))
+        transformed = transformar(base, factor=factor, **parametros)
         transformed_rgb = cv2.cvtColor(transformed, cv2.COLOR_BGR2RGB)
 
         st.image(transformed_rgb, caption="📐 Imagen transformada", use_container_width=True)
+        descarga_resolucion_completa(lambda: transformar(img, **parametros),
+                                     "transformada.png", "capitulo1")
 
         #
         st.markdown("""
@@ -58,3 +226,26 @@ def app():
 
     else:
         st.info("⬆️ Por favor, sube una imagen para comenzar.")
+
+
+def app_en_vivo():
+    # streamlit-webrtc se importa solo al abrir el modo en vivo: la carga
+    # de este capítulo (el primero del menú) sigue siendo inmediata
+    from streamlit_webrtc import webrtc_streamer
+    from live_processor import ProcesadorDelegado, mostrar_metricas
+
+    st.markdown("🎥 La misma transformación se aplica a cada cuadro de la cámara. Las tablas de "
+                "`remap` se calculan una vez por cada combinación de controles y se reutilizan.")
+    st.subheader("⚙️ Ajustes de transformación")
+    parametros = controles_transformacion()
+
+    ctx = webrtc_streamer(
+        key="capitulo1-correccion",
+        video_processor_factory=lambda: ProcesadorDelegado(CorrectorGeometrico(parametros)),
+        media_stream_constraints={"video": True, "audio": False},
+        async_processing=True,
+    )
+    # Los controles se aplican al stream que ya está corriendo
+    if ctx.video_processor:
+        ctx.video_processor.motor.parametros = parametros
+    mostrar_metricas(ctx)
@@ -3,7 +3,9 @@ import cv2
 import numpy as np
 import time
 import av
-from streamlit_webrtc import webrtc_streamer, VideoTransformerBase
+from streamlit_webrtc import webrtc_streamer
+from video_pipeline import VideoPipeline, DisplaySink, formatear_stats, sin_medir
+from live_processor import ProcesadorEnVivo, mostrar_metricas
 
 # ======================================================
 # 📘 Capítulo 10 — Realidad Aumentada sobre Color
@@ -27,109 +29,263 @@ def app():
     )
 
     video_file = None
+    target_fps, ancho_vista = 15, 640
     if fuente == "📂 Subir archivo de video":
         video_file = st.file_uploader("📂 Sube un video (MP4, AVI, MOV)", type=["mp4", "avi", "mov"])
+        with st.expander("⚙️ Opciones de reproducción"):
+            target_fps = st.slider("🎞️ FPS de visualización", 5, 60, 15,
+                                   help="Solo limita las actualizaciones de la página; el video se "
+                                        "procesa a toda velocidad.")
+            ancho_vista = st.select_slider("🖼️ Ancho de la vista previa (px)", [320, 480, 640, 960], 640)
+
+    with st.expander("⚙️ Modo de detección"):
+        seguir = st.checkbox("🎯 Detectar y seguir (más rápido)",
+                             help="La detección completa corre cada N cuadros; entre medio cada "
+                                  "objeto se sigue con CamShift en una ventana pequeña.")
+        intervalo = 1
+        if seguir:
+            intervalo = st.slider("🔁 Detección completa cada N cuadros", 2, 30, 10)
 
     if fuente == "📹 Cámara en vivo (Stream)":
         st.success("🎥 Cámara en vivo activada. ¡Disfruta del efecto AR!")
-        webrtc_streamer(
+        ctx = webrtc_streamer(
             key="ar-color",
-            video_transformer_factory=ColorARTransformer,
+            video_processor_factory=lambda: ColorARTransformer(intervalo),
             media_stream_constraints={"video": True, "audio": False},
+            async_processing=True,
         )
+        # El transformador ya creado sigue los cambios del control sin reiniciar la cámara
+        if ctx.video_processor:
+            ctx.video_processor.motor.intervalo_deteccion = intervalo
+        mostrar_metricas(ctx)
 
     elif video_file:
-        ejecutar_realidad_aumentada(video_file)
+        ejecutar_realidad_aumentada(video_file, intervalo, target_fps, ancho_vista)
 
     st.markdown("---\n✅ **Alumna:** 🦉 Zanabria Yrigoin, Gaby Lizeth")
 
 
 # ======================================================
-# 🧠 Clase que aplica el efecto AR en tiempo real
+# 🎨 Motor de realidad aumentada compartido
 # ======================================================
-class ColorARTransformer(VideoTransformerBase):
-    def transform(self, frame):
-        img = frame.to_ndarray(format="bgr24")
-        scaling_factor = 0.6
-        img = cv2.resize(img, None, fx=scaling_factor, fy=scaling_factor)
+# Rango del color azul en HSV
+LOWER_BLUE = np.array([100, 120, 70])
+UPPER_BLUE = np.array([140, 255, 255])
+
+
+def unir_cajas(cajas):
+    """
+    Une las cajas ``[x0, y0, x1, y1]`` que se solapan hasta que todas sean
+    disjuntas. Devuelve las cajas resultantes y, por cada una, los índices de
+    las cajas originales que contiene.
+    """
+    grupos = [[list(caja), [i]] for i, caja in enumerate(cajas)]
+    unido = True
+    while unido:
+        unido = False
+        for i in range(len(grupos)):
+            for j in range(i + 1, len(grupos)):
+                a, b = grupos[i][0], grupos[j][0]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    grupos[i][0] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    grupos[i][1] += grupos[j][1]
+                    del grupos[j]
+                    unido = True
+                    break
+            if unido:
+                break
+    return grupos
+
+
+class MotorAR:
+    """
+    Efecto AR sobre los objetos azules, común a la cámara en vivo y a los
+    archivos subidos. La mezcla con transparencia se hace solo dentro de las
+    cajas de los contornos con área > ``area_minima``: fuera de ellas la capa
+    es igual a la imagen y ``addWeighted`` no cambiaría nada, así que el
+    resultado es idéntico al de mezclar el cuadro completo.
+
+    Los buffers (cuadro reducido, HSV, máscara y capa) se reservan una vez y
+    se reutilizan; el cuadro devuelto se sobrescribe en la siguiente llamada.
+
+    Con ``intervalo_deteccion`` = N > 1 se usa el modo detectar-y-seguir: la
+    detección completa (HSV, ``inRange`` y ``findContours`` en todo el
+    cuadro) solo corre cada N cuadros; entre detecciones cada objeto se sigue
+    con CamShift sobre la retroproyección de su histograma de tono, mirando
+    solo una ventana de búsqueda alrededor de su última posición. Si la
+    confianza de algún seguimiento cae por debajo de ``confianza_minima`` se
+    vuelve a detectar en ese mismo cuadro.
+    """
 
-        # Convertir a HSV
-        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV)
+    def __init__(self, scaling_factor=0.6, area_minima=1000, alpha=0.5,
+                 intervalo_deteccion=1, confianza_minima=0.3, margen=0.5):
+        self.scaling_factor = scaling_factor
+        self.area_minima = area_minima
+        self.alpha = alpha
+        self.intervalo_deteccion = intervalo_deteccion
+        self.confianza_minima = confianza_minima
+        self.margen = margen
+        self.criterio = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 1)
+        self.objetos = []  # [ventana (x, y, w, h), histograma de tono]
+        self.cuadros_desde_deteccion = 0
+        self.detecciones = 0
+        self.seguimientos = 0
+        self._img = None
+        self._hsv = None
+        self._mask = None
+        self._overlay = None
 
-        # 🎨 Rango del color azul
-        lower_blue = np.array([100, 120, 70])
-        upper_blue = np.array([140, 255, 255])
+    def _buffers(self, frame):
+        h, w = frame.shape[:2]
+        size = (round(w * self.scaling_factor), round(h * self.scaling_factor))
+        if self._img is None or self._img.shape[:2] != (size[1], size[0]):
+            self._img = np.empty((size[1], size[0], 3), np.uint8)
+            self._hsv = np.empty_like(self._img)
+            self._mask = np.empty(self._img.shape[:2], np.uint8)
+            self._overlay = np.empty_like(self._img)
+            self.objetos = []
+
+    def procesar(self, frame, t=None, etapa=sin_medir):
+        with etapa("color"):
+            self._buffers(frame)
+            img = cv2.resize(frame, None, dst=self._img, fx=self.scaling_factor, fy=self.scaling_factor)
+
+        with etapa("algoritmo"):
+            contours = None
+            if self.objetos and self.cuadros_desde_deteccion < self.intervalo_deteccion - 1:
+                contours = self._seguir(img)
+            if contours is None:
+                contours = self._detectar(img)
+            else:
+                self.cuadros_desde_deteccion += 1
+
+        if contours:
+            with etapa("dibujo"):
+                self._mezclar(img, contours, time.time() if t is None else t)
+        return img
+
+    # ------------------------------
+    # Detección completa
+    # ------------------------------
+    def _detectar(self, img):
+        hsv = cv2.cvtColor(img, cv2.COLOR_BGR2HSV, dst=self._hsv)
 
         # Crear máscara y buscar contornos
-        mask = cv2.inRange(hsv, lower_blue, upper_blue)
+        mask = cv2.inRange(hsv, LOWER_BLUE, UPPER_BLUE, dst=self._mask)
         contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        contours = [c for c in contours if cv2.contourArea(c) > self.area_minima]
+
+        self.detecciones += 1
+        self.cuadros_desde_deteccion = 0
+        self.objetos = []
+        if self.intervalo_deteccion > 1:
+            for contour in contours:
+                x, y, w, h = cv2.boundingRect(contour)
+                hist = cv2.calcHist([hsv[y:y + h, x:x + w]], [0], mask[y:y + h, x:x + w],
+                                    [180], [0, 180])
+                cv2.normalize(hist, hist, 0, 255, cv2.NORM_MINMAX)
+                self.objetos.append([(x, y, w, h), hist])
+        return contours
+
+    # ------------------------------
+    # Seguimiento entre detecciones
+    # ------------------------------
+    def _seguir(self, img):
+        """Contornos de los objetos seguidos, o ``None`` si hay que volver a detectar."""
+        alto, ancho = img.shape[:2]
+        contours = []
+        for objeto in self.objetos:
+            (x, y, w, h), hist = objeto
+
+            # Ventana de búsqueda: la última posición con un margen alrededor
+            mx, my = int(w * self.margen) + 1, int(h * self.margen) + 1
+            x0, y0 = max(x - mx, 0), max(y - my, 0)
+            x1, y1 = min(x + w + mx, ancho), min(y + h + my, alto)
+            hsv = cv2.cvtColor(img[y0:y1, x0:x1], cv2.COLOR_BGR2HSV)
+            mask = cv2.inRange(hsv, LOWER_BLUE, UPPER_BLUE)
+            prob = cv2.calcBackProject([hsv], [0], hist, [0, 180], 1)
+            cv2.bitwise_and(prob, mask, dst=prob)
+
+            _, (vx, vy, vw, vh) = cv2.CamShift(prob, (x - x0, y - y0, w, h), self.criterio)
+            if vw == 0 or vh == 0:
+                return None
+            confianza = cv2.mean(prob[vy:vy + vh, vx:vx + vw])[0] / 255
+            if confianza < self.confianza_minima:
+                return None
 
-        # Crear una capa de superposición
-        overlay = img.copy()
+            # La forma exacta sale de la máscara, pero solo dentro de la ventana de búsqueda
+            encontrados, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE,
+                                              offset=(x0, y0))
+            encontrados = [c for c in encontrados if cv2.contourArea(c) > self.area_minima]
+            if not encontrados:
+                return None
+            contours.extend(encontrados)
+            objeto[0] = (x0 + vx, y0 + vy, vw, vh)
+
+        self.seguimientos += 1
+        return contours
+
+    # ------------------------------
+    # Mezcla solo dentro de las cajas
+    # ------------------------------
+    def _mezclar(self, img, contours, t):
+        # Color dinámico tipo AR
+        color = (int(128 + 127 * np.sin(t * 2)), int(128 + 127 * np.sin(t * 3)), 255)
+
+        cajas = []
         for contour in contours:
-            area = cv2.contourArea(contour)
-            if area > 1000:
-                # Color dinámico tipo AR
-                color = (
-                    int(128 + 127 * np.sin(time.time() * 2)),
-                    int(128 + 127 * np.sin(time.time() * 3)),
-                    255
-                )
-                cv2.drawContours(overlay, [contour], -1, color, -1)
+            x, y, w, h = cv2.boundingRect(contour)
+            cajas.append((x, y, x + w, y + h))
+
+        # Mezclar la capa con transparencia solo dentro de cada caja
+        for (x0, y0, x1, y1), indices in unir_cajas(cajas):
+            roi = img[y0:y1, x0:x1]
+            overlay = self._overlay[y0:y1, x0:x1]
+            np.copyto(overlay, roi)
+            cv2.drawContours(overlay, [contours[i] for i in indices], -1, color, -1,
+                             offset=(-x0, -y0))
+            cv2.addWeighted(overlay, self.alpha, roi, 1 - self.alpha, 0, dst=roi)
 
-        # Mezclar la capa con transparencia
-        alpha = 0.5
-        output = cv2.addWeighted(overlay, alpha, img, 1 - alpha, 0)
 
-        return output
+# ======================================================
+# 🧠 Clase que aplica el efecto AR en tiempo real
+# ======================================================
+class ColorARTransformer(ProcesadorEnVivo):
+    def __init__(self, intervalo_deteccion=1):
+        super().__init__()
+        self.motor = MotorAR(intervalo_deteccion=intervalo_deteccion)
+
+    def procesar_imagen(self, img):
+        return self.motor.procesar(img, etapa=self.etapa)
 
 
 # ======================================================
 # 📂 Procesamiento de un archivo de video subido
 # ======================================================
-def ejecutar_realidad_aumentada(video_file):
+def ejecutar_realidad_aumentada(video_file, intervalo_deteccion=1, target_fps=15, ancho_vista=640):
     import tempfile
 
     temp_file = tempfile.NamedTemporaryFile(delete=False)
     temp_file.write(video_file.read())
     cap = cv2.VideoCapture(temp_file.name)
-    scaling_factor = 0.6
     stframe_main = st.empty()
+    motor = MotorAR(intervalo_deteccion=intervalo_deteccion)
 
     st.info("🔵 Detectando color azul y aplicando efecto de realidad aumentada...")
 
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        frame = cv2.resize(frame, None, fx=scaling_factor, fy=scaling_factor)
-        hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-
-        lower_blue = np.array([100, 120, 70])
-        upper_blue = np.array([140, 255, 255])
-
-        mask = cv2.inRange(hsv, lower_blue, upper_blue)
-        contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-
-        overlay = frame.copy()
-        for contour in contours:
-            area = cv2.contourArea(contour)
-            if area > 1000:
-                color = (
-                    int(128 + 127 * np.sin(time.time() * 2)),
-                    int(128 + 127 * np.sin(time.time() * 3)),
-                    255
-                )
-                cv2.drawContours(overlay, [contour], -1, color, -1)
-
-        alpha = 0.5
-        frame = cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0)
+    sink = DisplaySink([stframe_main], ["🌈 Realidad Aumentada sobre Color Azul"],
+                       max_fps=target_fps, ancho_max=ancho_vista)
 
-        stframe_main.image(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB),
-                           caption="🌈 Realidad Aumentada sobre Color Azul",
-                           channels="RGB", use_container_width=True)
+    def procesar(frame):
+        return sink.preparar([motor.procesar(frame)])
 
-        time.sleep(0.03)
+    # Archivo subido: se procesan todos los cuadros a toda velocidad y la
+    # página se actualiza como mucho ``target_fps`` veces por segundo
+    pipeline = VideoPipeline(cap, procesar, sink.mostrar, target_fps=0, drop_oldest=False)
+    stats = {**pipeline.run(), **sink.stats()}
 
     cap.release()
+    st.caption(formatear_stats(stats))
+    if intervalo_deteccion > 1:
+        st.caption(f"🎯 {motor.detecciones} detecciones completas · "
+                   f"{motor.seguimientos} cuadros resueltos con seguimiento")
@@ -1,6 +1,188 @@
 import streamlit as st
 import cv2
 import numpy as np
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from imagenes import cargar_imagen, descarga_resolucion_completa
+
+# ==============================
+# 🧮 Registro de kernels
+# ==============================
+class FiltroKernel:
+    """
+    Kernel precalculado una sola vez con la primitiva de OpenCV más rápida
+    que da el mismo resultado que ``cv2.filter2D``:
+
+    - identidad → copia;
+    - caja (valores iguales sobre un rectángulo centrado que suman 1) →
+      ``cv2.blur``, de costo constante por píxel;
+    - separable (rango 1) → ``cv2.sepFilter2D`` con los dos vectores;
+    - cualquier otro → ``cv2.filter2D``.
+    """
+
+    def __init__(self, kernel):
+        self.kernel = np.asarray(kernel, np.float32)
+        self.tipo = "general"
+        self.caja = None
+        self.kx = self.ky = None
+
+        rows, cols = self.kernel.shape
+        ys, xs = np.nonzero(self.kernel)
+        valores = self.kernel[ys, xs]
+        centrado = (ys.min() + ys.max() == rows - 1) and (xs.min() + xs.max() == cols - 1)
+        ancho, alto = int(xs.max() - xs.min()) + 1, int(ys.max() - ys.min()) + 1
+        if len(valores) == 1 and centrado and valores[0] == 1:
+            self.tipo = "identidad"
+        elif (centrado and len(valores) == ancho * alto
+              and np.allclose(valores, valores[0]) and np.isclose(valores.sum(), 1)):
+            self.tipo = "caja"
+            self.caja = (ancho, alto)
+        else:
+            u, sv, vt = np.linalg.svd(self.kernel.astype(np.float64))
+            if sv[1] <= 1e-6 * sv[0]:
+                self.tipo = "separable"
+                self.ky = (u[:, 0] * np.sqrt(sv[0])).astype(np.float32)
+                self.kx = (vt[0] * np.sqrt(sv[0])).astype(np.float32)
+
+    def aplicar(self, img):
+        if self.tipo == "identidad":
+            return img.copy()
+        if self.tipo == "caja":
+            return cv2.blur(img, self.caja)
+        if self.tipo == "separable":
+            return cv2.sepFilter2D(img, -1, self.kx, self.ky)
+        return cv2.filter2D(img, -1, self.kernel)
+
+
+def kernel_movimiento(size=15):
+    """Desenfoque por movimiento: una fila central de ``size`` unos normalizada."""
+    kernel = np.zeros((size, size))
+    kernel[int((size - 1) / 2), :] = np.ones(size)
+    return kernel / size
+
+
+FILTROS = {
+    "Filtro identidad": FiltroKernel([[0, 0, 0], [0, 1, 0], [0, 0, 0]]),
+    "Filtro promedio 3x3": FiltroKernel(np.ones((3, 3)) / 9),
+    "Filtro promedio 5x5": FiltroKernel(np.ones((5, 5)) / 25),
+    "Desenfoque por movimiento": FiltroKernel(kernel_movimiento(15)),
+    "Enfocar imagen": FiltroKernel([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]]),
+    "Enfocado fuerte": FiltroKernel([[1, 1, 1], [1, -7, 1], [1, 1, 1]]),
+    "Realce de bordes": FiltroKernel(np.array([
+        [-1, -1, -1, -1, -1],
+        [-1, 2, 2, 2, -1],
+        [-1, 2, 8, 2, -1],
+        [-1, 2, 2, 2, -1],
+        [-1, -1, -1, -1, -1]
+    ]) / 8.0),
+    # Se aplica sobre gris y con un offset de 128 (ver aplicar_filtro)
+    "Relieve (Emboss)": FiltroKernel([[0, -1, -1], [1, 0, -1], [1, 1, 0]]),
+}
+
+# Filtros cuyo efecto depende del tamaño del kernel en píxeles: sobre un
+# proxy reducido se reconstruyen con el tamaño escalado (impar, mínimo 1)
+# para que la vista previa se vea como el resultado a resolución completa
+FILTROS_ESCALABLES = {
+    "Filtro promedio 3x3": (3, lambda k: np.ones((k, k)) / k ** 2),
+    "Filtro promedio 5x5": (5, lambda k: np.ones((k, k)) / k ** 2),
+    "Desenfoque por movimiento": (15, kernel_movimiento),
+}
+
+
+@lru_cache(maxsize=32)
+def filtro_escalado(nombre, factor=1.0):
+    """``FILTROS[nombre]`` para una imagen reducida por ``factor``."""
+    if nombre not in FILTROS_ESCALABLES or factor >= 1:
+        return FILTROS[nombre]
+    size, construir = FILTROS_ESCALABLES[nombre]
+    return FiltroKernel(construir(2 * max(0, round((size * factor - 1) / 2)) + 1))
+
+
+# Máscaras de viñeta ya calculadas, por tamaño. Una máscara a resolución
+# completa ocupa tanto como la imagen (36 MB a 4000×3000 en color), así que
+# se expulsan por LRU cuando el total supera el presupuesto en bytes.
+PRESUPUESTO_VINETAS = 64 * 1024 * 1024
+_vinetas = OrderedDict()
+_vinetas_lock = threading.Lock()
+
+
+def mascara_vineta(rows, cols, canales=3, sigma=200):
+    """
+    Máscara de viñeta (uint8, ``canales`` canales) para imágenes de
+    ``rows``×``cols``, calculada una vez por tamaño.
+    """
+    clave = (rows, cols, canales, sigma)
+    with _vinetas_lock:
+        mask = _vinetas.get(clave)
+        if mask is not None:
+            _vinetas.move_to_end(clave)
+            return mask
+    mask = calcular_mascara_vineta(rows, cols, canales, sigma)
+    with _vinetas_lock:
+        _vinetas[clave] = mask
+        _vinetas.move_to_end(clave)
+        # La más reciente nunca se expulsa, aunque sola supere el presupuesto
+        while len(_vinetas) > 1 and sum(m.nbytes for m in _vinetas.values()) > PRESUPUESTO_VINETAS:
+            _vinetas.popitem(last=False)
+    return mask
+
+
+def calcular_mascara_vineta(rows, cols, canales=3, sigma=200):
+    """
+    Máscara de viñeta de solo lectura para ``rows``×``cols``. Es el cuadrante inferior
+    derecho de una gaussiana de 1.5× el tamaño, armado directamente con los
+    dos vectores 1-D en lugar de la matriz completa: la norma de su producto
+    exterior es el producto de las normas.
+    """
+    kernel_x = cv2.getGaussianKernel(int(1.5 * cols), sigma)
+    kernel_y = cv2.getGaussianKernel(int(1.5 * rows), sigma)
+    norma = np.linalg.norm(kernel_x) * np.linalg.norm(kernel_y)
+    mask = 255 * (kernel_y[int(0.5 * rows):] * kernel_x[int(0.5 * cols):].T) / norma
+    mask = mask.astype(np.uint8)
+    if canales > 1:
+        mask = cv2.merge([mask] * canales)
+    mask.setflags(write=False)
+    return mask
+
+
+def aplicar_vineta(img, sigma=200):
+    """Oscurece los bordes multiplicando todos los canales a la vez por la máscara."""
+    rows, cols = img.shape[:2]
+    canales = img.shape[2] if img.ndim == 3 else 1
+    return cv2.multiply(img, mascara_vineta(rows, cols, canales, sigma), scale=1/255)
+
+
+def aplicar_filtro(img, filtro, factor=1.0, gray=None):
+    """
+    Aplica ``filtro`` a ``img`` (BGR). ``factor`` < 1 indica un proxy
+    reducido: los tamaños en píxeles (kernels, sigma de la viñeta) se escalan.
+    """
+    if filtro == "Relieve (Emboss)":
+        # Efecto relieve. Se convierte a gris y se añade offset para visibilidad
+        if gray is None:
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        return FILTROS[filtro].aplicar(gray) + 128
+
+    if filtro == "Viñeta":
+        # Efecto viñeta (oscurecimiento en los bordes)
+        return aplicar_vineta(img, 200 * factor)
+
+    # Kernels precalculados: caja, separable o filter2D según corresponda
+    return filtro_escalado(filtro, factor).aplicar(img)
+
+
+def detectar_bordes(gray, metodo, ksize=5, min_val=50, max_val=240):
+    """Sobel, Laplaciano o Canny sobre ``gray``, convertido a 8 bits para mostrar."""
+    if metodo in ["Sobel Horizontal", "Sobel Vertical"]:
+        dx, dy = (1, 0) if metodo == "Sobel Horizontal" else (0, 1)
+        resultado = cv2.Sobel(gray, cv2.CV_64F, dx, dy, ksize=ksize)
+    elif metodo == "Laplaciano":
+        resultado = cv2.Laplacian(gray, cv2.CV_64F)
+    else:
+        resultado = cv2.Canny(gray, min_val, max_val)
+    return cv2.convertScaleAbs(resultado)
+
 
 def app():
     # ==============================
@@ -35,14 +217,24 @@ def app():
     uploaded_file = st.file_uploader("📷 Sube una imagen", type=["jpg", "jpeg", "png"])
 
     if uploaded_file is not None:
-        file_bytes = np.asarray(bytearray(uploaded_file.read()), dtype=np.uint8)
-        img = cv2.imdecode(file_bytes, 1)
-        # Convertir de BGR (OpenCV) a RGB (Streamlit)
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB) 
+        # Decodificada una sola vez; gris y RGB también quedan en la caché
+        imagen = cargar_imagen(uploaded_file)
+        img = imagen.bgr
 
-        st.image(img_rgb, caption="🖼️ Imagen original", use_container_width=True)
+        st.image(imagen.vista(), caption="🖼️ Imagen original", use_container_width=True)
         st.divider()
 
+        # La vista previa trabaja sobre un proxy del tamaño de pantalla: el
+        # costo de cada cambio no depende del tamaño de la foto
+        vista_rapida = st.checkbox("⚡ Vista previa rápida (resolución de pantalla)", value=True,
+                                   help="Procesa una copia reducida mientras ajustas los controles. "
+                                        "La resolución completa se procesa solo al descargar.")
+        if vista_rapida:
+            base, factor = imagen.proxy(), imagen.factor_proxy()
+            gray = cv2.cvtColor(base, cv2.COLOR_BGR2GRAY)
+        else:
+            base, factor, gray = img, 1.0, imagen.gris
+
         # ==============================
         # 🧮 Selección del tipo de operación
         # ==============================
@@ -72,116 +264,44 @@ def app():
                 index=0
             )
 
-            output = None
-
-            if filtro == "Filtro identidad":
-                # Kernel que no modifica la imagen
-                kernel = np.array([[0,0,0],[0,1,0],[0,0,0]])
-                output = cv2.filter2D(img, -1, kernel)
-
-            elif filtro == "Filtro promedio 3x3":
-                # Kernel para suavizado/promedio simple
-                kernel = np.ones((3,3), np.float32) / 9
-                output = cv2.filter2D(img, -1, kernel)
-
-            elif filtro == "Filtro promedio 5x5":
-                # Kernel para suavizado/promedio más fuerte
-                kernel = np.ones((5,5), np.float32) / 25
-                output = cv2.filter2D(img, -1, kernel)
-
-            elif filtro == "Desenfoque por movimiento":
-                # Kernel para 'motion blur'
-                size = 15
-                kernel_motion = np.zeros((size, size))
-                kernel_motion[int((size-1)/2), :] = np.ones(size)
-                kernel_motion = kernel_motion / size
-                output = cv2.filter2D(img, -1, kernel_motion)
-
-            elif filtro == "Enfocar imagen":
-                # Kernel para enfoque (Sharpness)
-                kernel_sharp = np.array([[-1,-1,-1], [-1,9,-1], [-1,-1,-1]])
-                output = cv2.filter2D(img, -1, kernel_sharp)
-
-            elif filtro == "Enfocado fuerte":
-                # Kernel para enfoque excesivo
-                kernel_excess = np.array([[1,1,1], [1,-7,1], [1,1,1]])
-                output = cv2.filter2D(img, -1, kernel_excess)
-
-            elif filtro == "Realce de bordes":
-                # Kernel de realce de bordes complejo
-                kernel_edge = np.array([
-                    [-1,-1,-1,-1,-1],
-                    [-1,2,2,2,-1],
-                    [-1,2,8,2,-1],
-                    [-1,2,2,2,-1],
-                    [-1,-1,-1,-1,-1]
-                ]) / 8.0
-                output = cv2.filter2D(img, -1, kernel_edge)
-
-            elif filtro == "Relieve (Emboss)":
-                # Efecto relieve. Se convierte a gris y se añade offset para visibilidad
-                gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-                kernel_emboss = np.array([[0,-1,-1],[1,0,-1],[1,1,0]])
-                output = cv2.filter2D(gray, -1, kernel_emboss) + 128 
-
-            elif filtro == "Viñeta":
-                # Efecto viñeta (oscurecimiento en los bordes)
-                rows, cols = img.shape[:2]
-                kernel_x = cv2.getGaussianKernel(int(1.5 * cols), 200)
-                kernel_y = cv2.getGaussianKernel(int(1.5 * rows), 200)
-                kernel = kernel_y * kernel_x.T
-                mask = 255 * kernel / np.linalg.norm(kernel)
-                mask = mask[int(0.5 * rows):, int(0.5 * cols):]
-                
-                output = np.copy(img)
-                # Aplicar la máscara a cada canal de color
-                for i in range(3):
-                    output[:,:,i] = cv2.multiply(output[:,:,i], mask.astype(output.dtype), scale=1/255)
-
-
-            if output is not None:
-                # Convertir a RGB solo si la imagen de salida es a color
-                if len(output.shape) == 3:
-                    output_rgb = cv2.cvtColor(output, cv2.COLOR_BGR2RGB)
-                else:
-                    output_rgb = output # Ya es monocromático
-                st.image(output_rgb, caption=f"🎨 Resultado: {filtro}", use_container_width=True)
+            output = aplicar_filtro(base, filtro, factor, gray)
+
+            # Convertir a RGB solo si la imagen de salida es a color
+            if len(output.shape) == 3:
+                output_rgb = cv2.cvtColor(output, cv2.COLOR_BGR2RGB)
+            else:
+                output_rgb = output # Ya es monocromático
+            st.image(output_rgb, caption=f"🎨 Resultado: {filtro}", use_container_width=True)
+            descarga_resolucion_completa(lambda: aplicar_filtro(img, filtro, gray=imagen.gris),
+                                         "filtro.png", "capitulo2_filtro")
 
         # ==============================
         # ⚙️ DETECCIÓN DE BORDES
         # ==============================
         else:
-            # Convertir a escala de grises para todos los detectores de bordes
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            # Todos los detectores de bordes trabajan en escala de grises
             metodo = st.selectbox(
                 "🔍 Selecciona el método de detección de bordes:",
                 ["Sobel Horizontal", "Sobel Vertical", "Laplaciano", "Canny"],
                 index=0
             )
 
-            resultado = None
+            ksize, min_val, max_val = 5, 50, 240
 
             if metodo in ["Sobel Horizontal", "Sobel Vertical"]:
                 # Configuración de Sobel (dx, dy)
                 ksize = st.slider("📏 Tamaño del kernel (1, 3, 5 o 7)", 1, 7, 5, step=2)
-                dx, dy = (1, 0) if metodo == "Sobel Horizontal" else (0, 1)
-                resultado = cv2.Sobel(gray, cv2.CV_64F, dx, dy, ksize=ksize)
-
-            elif metodo == "Laplaciano":
-                # Aplicar Laplaciano
-                resultado = cv2.Laplacian(gray, cv2.CV_64F)
 
             elif metodo == "Canny":
                 # Configuración de Canny
                 st.write("🔧 Ajusta los umbrales para definir la sensibilidad del detector:")
                 min_val = st.slider("🔹 Umbral mínimo", 0, 255, 50)
                 max_val = st.slider("🔸 Umbral máximo", 0, 255, 240)
-                resultado = cv2.Canny(gray, min_val, max_val)
-            
-            if resultado is not None:
-                # Convertir a 8-bit para visualización
-                resultado = cv2.convertScaleAbs(resultado) 
-                st.image(resultado, caption=f"📐 Resultado: {metodo}", use_container_width=True)
+
+            resultado = detectar_bordes(gray, metodo, ksize, min_val, max_val)
+            st.image(resultado, caption=f"📐 Resultado: {metodo}", use_container_width=True)
+            descarga_resolucion_completa(lambda: detectar_bordes(imagen.gris, metodo, ksize, min_val, max_val),
+                                         "bordes.png", "capitulo2_bordes")
 
         # ==============================
         # 📚 Créditos
@@ -2,19 +2,21 @@ import streamlit as st
 import cv2
 import numpy as np
 import av
-from streamlit_webrtc import webrtc_streamer, VideoTransformerBase
+import time
+from streamlit_webrtc import webrtc_streamer
+from live_processor import ProcesadorEnVivo, mostrar_metricas
 
 # ============================
 # Función de cartoonización
 # ============================
-def cartoonize_image(img, ksize=5, sketch_mode=False):
+def cartoonize_image(img, ksize=5, sketch_mode=False, num_repetitions=10, ds_factor=4, median_ksize=7):
     """
     Convierte una imagen a estilo cartoon o sketch.
     """
-    num_repetitions, sigma_color, sigma_space, ds_factor = 10, 5, 7, 4
+    sigma_color, sigma_space = 5, 7
 
     img_gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    img_gray = cv2.medianBlur(img_gray, 7)
+    img_gray = cv2.medianBlur(img_gray, median_ksize)
 
     edges = cv2.Laplacian(img_gray, cv2.CV_8U, ksize=ksize)
     _, mask = cv2.threshold(edges, 100, 255, cv2.THRESH_BINARY_INV)
@@ -30,17 +32,172 @@ def cartoonize_image(img, ksize=5, sketch_mode=False):
     dst = cv2.bitwise_and(img_output, img_output, mask=mask)
     return dst
 
+# ============================
+# Cartoonización por bloques para fotos grandes
+# ============================
+# Umbral a partir del cual conviene partir la imagen (en píxeles)
+PIXELES_POR_BLOQUES = 4_000_000
+
+
+def por_bloques(src, dst, funcion, tile, halo, pool):
+    """
+    Aplica ``funcion`` a ``src`` por bloques de ``tile`` píxeles: cada bloque
+    se procesa con ``halo`` píxeles extra alrededor y solo su centro se copia
+    a ``dst``, así el resultado no tiene costuras si ``halo`` cubre el radio
+    de ``funcion``.
+    """
+    h, w = src.shape[:2]
+
+    def procesar(y, x):
+        y0, x0 = max(y - halo, 0), max(x - halo, 0)
+        y1, x1 = min(y + tile + halo, h), min(x + tile + halo, w)
+        bloque = funcion(src[y0:y1, x0:x1])
+        alto, ancho = min(tile, h - y), min(tile, w - x)
+        dst[y:y + alto, x:x + ancho] = bloque[y - y0:y - y0 + alto, x - x0:x - x0 + ancho]
+
+    futuros = [pool.submit(procesar, y, x) for y in range(0, h, tile) for x in range(0, w, tile)]
+    for futuro in futuros:
+        futuro.result()
+    return dst
+
+
+def cartoonize_tiled(img, ksize=5, sketch_mode=False, num_repetitions=10, ds_factor=4, median_ksize=7,
+                     tile=1024, workers=None):
+    """
+    Mismo resultado que ``cartoonize_image`` para fotos grandes. Las etapas
+    caras se reparten por bloques en un pool de hilos (OpenCV libera el GIL):
+
+    - líneas (gris, median blur, Laplaciano, umbral) a resolución completa,
+      con un halo igual a la suma de los radios del median y del Laplaciano;
+    - pasadas del bilateral sobre la imagen ya reducida, con un halo igual al
+      radio acumulado de todas las pasadas.
+
+    La reducción, la ampliación y la máscara final se hacen sobre la imagen
+    completa, como en una sola pasada, para que la grilla de interpolación
+    sea la misma aunque el tamaño no sea múltiplo de ``ds_factor``.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    sigma_color, sigma_space = 5, 7
+
+    def lineas(bloque):
+        gray = cv2.cvtColor(bloque, cv2.COLOR_BGR2GRAY)
+        gray = cv2.medianBlur(gray, median_ksize)
+        edges = cv2.Laplacian(gray, cv2.CV_8U, ksize=ksize)
+        return cv2.threshold(edges, 100, 255, cv2.THRESH_BINARY_INV)[1]
+
+    def bilateral(bloque):
+        for _ in range(num_repetitions):
+            bloque = cv2.bilateralFilter(bloque, ksize, sigma_color, sigma_space)
+        return bloque
+
+    with ThreadPoolExecutor(workers) as pool:
+        halo_lineas = median_ksize // 2 + max(ksize // 2, 1)
+        mask = por_bloques(img, np.empty(img.shape[:2], np.uint8), lineas, tile, halo_lineas, pool)
+        if sketch_mode:
+            return cv2.cvtColor(mask, cv2.COLOR_GRAY2BGR)
+
+        img_small = cv2.resize(img, None, fx=1.0/ds_factor, fy=1.0/ds_factor, interpolation=cv2.INTER_AREA)
+        # bilateralFilter usa un radio mínimo de 1 aunque ksize sea 1
+        halo_bilateral = num_repetitions * max(ksize // 2, 1)
+        img_small = por_bloques(img_small, np.empty_like(img_small), bilateral,
+                                max(tile // ds_factor, 1), halo_bilateral, pool)
+
+    img_output = cv2.resize(img_small, (img.shape[1], img.shape[0]), interpolation=cv2.INTER_LINEAR)
+    return cv2.bitwise_and(img_output, img_output, mask=mask)
+
+# ============================
+# Gobernador de calidad para el stream
+# ============================
+# Niveles de calidad de mejor a más rápido:
+# (repeticiones del bilateral, factor de reducción, tamaño del median blur)
+NIVELES_CALIDAD = [
+    (10, 4, 7),
+    (10, 4, 5),
+    (6, 4, 5),
+    (4, 6, 5),
+    (3, 8, 3),
+    (1, 10, 3),
+]
+
+
+class GobernadorCalidad:
+    """
+    Ajusta el nivel de ``NIVELES_CALIDAD`` para sostener ``target_fps``.
+    Mide el tiempo de procesamiento por cuadro (media exponencial): si supera
+    el presupuesto baja un nivel; si sobra margen durante ``cuadros_subida``
+    cuadros seguidos recupera uno. Tras cada cambio espera ``enfriamiento``
+    cuadros antes de volver a decidir, para no oscilar.
+    """
+
+    def __init__(self, target_fps=15, nivel=0, margen_subida=0.6, cuadros_subida=30, enfriamiento=5):
+        self.target_fps = target_fps
+        self.nivel = nivel
+        self.margen_subida = margen_subida
+        self.cuadros_subida = cuadros_subida
+        self.enfriamiento = enfriamiento
+        self.tiempo_medio = None
+        self._holgura = 0
+        self._desde_cambio = 0
+
+    def parametros(self):
+        repeticiones, ds_factor, median_ksize = NIVELES_CALIDAD[self.nivel]
+        return dict(num_repetitions=repeticiones, ds_factor=ds_factor, median_ksize=median_ksize)
+
+    def registrar(self, duracion):
+        if self.tiempo_medio is None:
+            self.tiempo_medio = duracion
+        else:
+            self.tiempo_medio = 0.8 * self.tiempo_medio + 0.2 * duracion
+        self._desde_cambio += 1
+        if self._desde_cambio < self.enfriamiento:
+            return
+
+        presupuesto = 1.0 / self.target_fps
+        if self.tiempo_medio > presupuesto and self.nivel < len(NIVELES_CALIDAD) - 1:
+            self._cambiar(self.nivel + 1)
+        elif self.tiempo_medio < presupuesto * self.margen_subida and self.nivel > 0:
+            self._holgura += 1
+            if self._holgura >= self.cuadros_subida:
+                self._cambiar(self.nivel - 1)
+        else:
+            self._holgura = 0
+
+    def _cambiar(self, nivel):
+        self.nivel = nivel
+        self.tiempo_medio = None
+        self._holgura = 0
+        self._desde_cambio = 0
+
+
 # ============================
 # Clase para stream en vivo
 # ============================
-class Cartoonizer(VideoTransformerBase):
-    def __init__(self):
+class Cartoonizer(ProcesadorEnVivo):
+    def __init__(self, target_fps=15, adaptativo=True):
+        super().__init__()
         self.ksize = 5
         self.sketch_mode = False
+        self.adaptativo = adaptativo
+        self.gobernador = GobernadorCalidad(target_fps)
+
+    def procesar_imagen(self, img):
+        if not self.adaptativo:
+            with self.etapa("algoritmo"):
+                return cartoonize_image(img, ksize=self.ksize, sketch_mode=self.sketch_mode)
+
+        inicio = time.perf_counter()
+        with self.etapa("algoritmo"):
+            cartoon = cartoonize_image(img, ksize=self.ksize, sketch_mode=self.sketch_mode,
+                                       **self.gobernador.parametros())
+        self.gobernador.registrar(time.perf_counter() - inicio)
 
-    def transform(self, frame):
-        img = frame.to_ndarray(format="bgr24")
-        cartoon = cartoonize_image(img, ksize=self.ksize, sketch_mode=self.sketch_mode)
+        with self.etapa("dibujo"):
+            # El nivel 0 es la mejor calidad: se muestra como N/N
+            texto = f"Calidad {len(NIVELES_CALIDAD) - self.gobernador.nivel}/{len(NIVELES_CALIDAD)}"
+            if self.gobernador.tiempo_medio is not None:
+                texto += f" | {1000 * self.gobernador.tiempo_medio:.0f} ms"
+            cv2.putText(cartoon, texto, (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
         return cartoon
 
 # ============================
@@ -81,11 +238,23 @@ def app():
     # ------------------------------
     elif fuente == "📹 Video en vivo (Stream)":
         st.markdown("🎥 Streaming en vivo desde la cámara (usa WebRTC en el navegador).")
-        webrtc_streamer(
+        with st.expander("⚙️ Calidad adaptativa"):
+            adaptativo = st.checkbox("🎚️ Ajustar la calidad para sostener los FPS", value=True,
+                                     help="Reduce las pasadas del filtro bilateral, aumenta la "
+                                          "reducción y achica el median blur si el equipo no "
+                                          "alcanza; recupera calidad cuando sobra margen.")
+            target_fps = st.slider("🎞️ FPS objetivo", 5, 30, 15)
+        ctx = webrtc_streamer(
             key="cartoonizer",
-            video_transformer_factory=Cartoonizer,
+            video_processor_factory=lambda: Cartoonizer(target_fps, adaptativo),
             media_stream_constraints={"video": True, "audio": False},
+            async_processing=True,
         )
+        # Los controles se aplican al stream que ya está corriendo
+        if ctx.video_processor:
+            ctx.video_processor.adaptativo = adaptativo
+            ctx.video_processor.gobernador.target_fps = target_fps
+        mostrar_metricas(ctx)
 
     # ------------------------------
     # Procesamiento de imagen estática
@@ -105,7 +274,10 @@ def app():
         ksize = st.slider("Tamaño de kernel", 1, 9, 5, step=2)
 
         sketch_mode = True if modo == "Solo sketch" else False
-        output = cartoonize_image(frame, ksize=ksize, sketch_mode=sketch_mode)
+        if frame.shape[0] * frame.shape[1] >= PIXELES_POR_BLOQUES:
+            output = cartoonize_tiled(frame, ksize=ksize, sketch_mode=sketch_mode)
+        else:
+            output = cartoonize_image(frame, ksize=ksize, sketch_mode=sketch_mode)
 
         st.image(cv2.cvtColor(output, cv2.COLOR_BGR2RGB), caption=f"Resultado: {modo}", use_container_width=True)
 
@@ -2,31 +2,221 @@ import streamlit as st
 import cv2
 import numpy as np
 import av
-from streamlit_webrtc import webrtc_streamer, VideoTransformerBase
+from streamlit_webrtc import webrtc_streamer
 import os
+import time
+from cascade_pool import obtener_pool, stats_pools
+from live_processor import ProcesadorEnVivo, mostrar_metricas
+from video_pipeline import sin_medir
 # ============================
 # Carga de clasificador Haar
 # ============================
+# Cada hilo (una sesión WebRTC, el script de Streamlit) toma prestada su
+# propia instancia del pool en lugar de compartir un clasificador global
 cascade_path = os.path.join(os.path.dirname(__file__), "cascade_files", "haarcascade_frontalface_alt.xml")
-face_cascade = cv2.CascadeClassifier(cascade_path)
+face_pool = obtener_pool(cascade_path)
+
+# ============================
+# Cascadas de partes del rostro
+# ============================
+# Cada parte se busca solo dentro de una región de la cara, dada como
+# fracciones (x0, y0, x1, y1) del ancho y alto de la caja; puede salir de la
+# caja (las orejas quedan a los lados). Los tamaños mínimo y máximo también
+# son fracciones del ancho de la cara. La oreja izquierda de la persona
+# aparece a la derecha de la imagen.
+PARTES = {
+    "👁️ Ojos": dict(archivo="haarcascade_eye.xml", region=(0.0, 0.15, 1.0, 0.6),
+                    tamanos=(0.12, 0.4), vecinos=5, color=(255, 0, 0)),
+    "👃 Nariz": dict(archivo="haarcascade_mcs_nose.xml", region=(0.2, 0.3, 0.8, 0.85),
+                     tamanos=(0.2, 0.5), vecinos=5, color=(0, 165, 255)),
+    "👄 Boca": dict(archivo="haarcascade_mcs_mouth.xml", region=(0.15, 0.65, 0.85, 1.05),
+                    tamanos=(0.25, 0.6), vecinos=11, color=(0, 0, 255)),
+    "👂 Oreja izquierda": dict(archivo="haarcascade_mcs_leftear.xml", region=(0.6, 0.0, 1.6, 1.1),
+                               tamanos=(0.15, 0.6), vecinos=3, color=(255, 0, 255)),
+    "👂 Oreja derecha": dict(archivo="haarcascade_mcs_rightear.xml", region=(-0.6, 0.0, 0.4, 1.1),
+                             tamanos=(0.15, 0.6), vecinos=3, color=(255, 255, 0)),
+}
+part_pools = {
+    nombre: obtener_pool(os.path.join(os.path.dirname(__file__), "cascade_files", parte["archivo"]))
+    for nombre, parte in PARTES.items()
+}
+
+
+def detect_parts(gray, faces, partes):
+    """
+    Busca las ``partes`` indicadas dentro de cada cara ``(x, y, w, h)`` de
+    ``faces``. Devuelve ``(nombre, (x, y, w, h))`` en coordenadas de ``gray``.
+    """
+    alto, ancho = gray.shape[:2]
+    encontradas = []
+    for (x, y, w, h) in faces:
+        for nombre in partes:
+            parte = PARTES[nombre]
+            fx0, fy0, fx1, fy1 = parte["region"]
+            x0, y0 = max(int(x + fx0 * w), 0), max(int(y + fy0 * h), 0)
+            x1, y1 = min(int(x + fx1 * w), ancho), min(int(y + fy1 * h), alto)
+            minimo, maximo = int(parte["tamanos"][0] * w), int(parte["tamanos"][1] * w)
+            if x1 - x0 < minimo or y1 - y0 < minimo:
+                continue
+            with part_pools[nombre].prestar() as cascada:
+                partes_cara = cascada.detectMultiScale(
+                    gray[y0:y1, x0:x1], scaleFactor=1.1, minNeighbors=parte["vecinos"],
+                    minSize=(minimo, minimo), maxSize=(maximo, maximo))
+            for (px, py, pw, ph) in partes_cara:
+                encontradas.append((nombre, (x0 + px, y0 + py, pw, ph)))
+    return encontradas
+
+
+def draw_parts(img, encontradas):
+    for nombre, (x, y, w, h) in encontradas:
+        cv2.rectangle(img, (x, y), (x + w, y + h), PARTES[nombre]["color"], 2)
+
 
 # ============================
 # Función para detección de caras en imágenes
 # ============================
-def detect_faces(img):
+def detect_faces(img, partes=()):
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-    faces = face_cascade.detectMultiScale(gray, scaleFactor=1.3, minNeighbors=3)
+    with face_pool.prestar() as face_cascade:
+        faces = face_cascade.detectMultiScale(gray, scaleFactor=1.3, minNeighbors=3)
     for (x, y, w, h) in faces:
         cv2.rectangle(img, (x,y), (x+w, y+h), (0,255,0), 2)
+    if partes:
+        draw_parts(img, detect_parts(gray, faces, partes))
     return img
 
+# ============================
+# Detección + seguimiento para el stream en vivo
+# ============================
+class SeguidorCaras:
+    """
+    Detección de caras para video en vivo. En lugar de ``detectMultiScale``
+    sobre el cuadro completo en cada cuadro:
+
+    - se detecta sobre una copia en gris reducida por ``escala`` y las cajas
+      se llevan de vuelta a resolución completa;
+    - la detección solo corre cada ``intervalo`` cuadros; entre medio cada
+      cara se sigue con ``matchTemplate`` en una ventana alrededor de su
+      última posición;
+    - si ya hay caras, la detección se limita a regiones alrededor de las
+      cajas anteriores (con tamaños mínimo y máximo derivados de ellas) y el
+      cuadro completo solo se revisa cada ``intervalo_completo`` detecciones
+      para encontrar caras nuevas.
+    """
+
+    def __init__(self, intervalo=5, escala=0.5, intervalo_completo=4, margen=0.5,
+                 similitud_minima=0.6, partes=()):
+        self.intervalo = intervalo
+        self.escala = escala
+        self.intervalo_completo = intervalo_completo
+        self.margen = margen
+        self.similitud_minima = similitud_minima
+        self.partes = partes
+        self.caras = []  # [(x, y, w, h) en el cuadro reducido, plantilla]
+        self.cuadro = 0
+        self.detecciones = 0
+        self.fps = 0.0
+        self.latencia_ms = 0.0
+        self._ultimo = None
+        self._escala_caras = escala
+
+    def procesar(self, img, etapa=sin_medir):
+        inicio = time.perf_counter()
+        if self.escala != self._escala_caras:
+            # Las cajas guardadas están en la escala anterior
+            self.caras = []
+            self._escala_caras = self.escala
+        with etapa("color"):
+            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+            small = cv2.resize(gray, None, fx=self.escala, fy=self.escala,
+                               interpolation=cv2.INTER_AREA)
+
+        with etapa("algoritmo"):
+            if self.cuadro % self.intervalo == 0 or (self.caras and not self._seguir(small)):
+                self._detectar(small)
+            self.cuadro += 1
+
+            faces = [(int(x / self.escala), int(y / self.escala), int(w / self.escala), int(h / self.escala))
+                     for (x, y, w, h), _ in self.caras]
+            encontradas = []
+            if self.partes:
+                # Las partes se buscan a resolución completa, pero solo dentro de cada cara
+                encontradas = detect_parts(gray, faces, self.partes)
+
+        with etapa("dibujo"):
+            for (x, y, w, h) in faces:
+                cv2.rectangle(img, (x, y), (x + w, y + h), (0, 255, 0), 2)
+            draw_parts(img, encontradas)
+            self._medir(inicio)
+            cv2.putText(img, f"{self.fps:.1f} FPS | {self.latencia_ms:.1f} ms", (10, 25),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
+        return img
+
+    # ------------------------------
+    # Detección
+    # ------------------------------
+    def _detectar(self, small):
+        completa = not self.caras or self.detecciones % self.intervalo_completo == 0
+        self.detecciones += 1
+        with face_pool.prestar() as face_cascade:
+            if completa:
+                cajas = list(face_cascade.detectMultiScale(small, scaleFactor=1.3, minNeighbors=3))
+            else:
+                cajas = []
+                for (x, y, w, h), _ in self.caras:
+                    x0, y0, x1, y1 = self._ventana(small, x, y, w, h)
+                    minimo = (int(w * 0.7), int(h * 0.7))
+                    maximo = (int(w * 1.5), int(h * 1.5))
+                    for cx, cy, cw, ch in face_cascade.detectMultiScale(
+                            small[y0:y1, x0:x1], scaleFactor=1.1, minNeighbors=3,
+                            minSize=minimo, maxSize=maximo):
+                        cajas.append((x0 + cx, y0 + cy, cw, ch))
+        self.caras = [((x, y, w, h), small[y:y + h, x:x + w].copy()) for x, y, w, h in cajas]
+
+    # ------------------------------
+    # Seguimiento entre detecciones
+    # ------------------------------
+    def _seguir(self, small):
+        """Actualiza las cajas por ``matchTemplate``; ``False`` si alguna cara se perdió."""
+        seguidas = []
+        for (x, y, w, h), plantilla in self.caras:
+            x0, y0, x1, y1 = self._ventana(small, x, y, w, h)
+            ventana = small[y0:y1, x0:x1]
+            if ventana.shape[0] < h or ventana.shape[1] < w:
+                return False
+            res = cv2.matchTemplate(ventana, plantilla, cv2.TM_CCOEFF_NORMED)
+            _, similitud, _, (mx, my) = cv2.minMaxLoc(res)
+            if similitud < self.similitud_minima:
+                return False
+            seguidas.append(((x0 + mx, y0 + my, w, h), plantilla))
+        self.caras = seguidas
+        return True
+
+    def _ventana(self, small, x, y, w, h):
+        mx, my = int(w * self.margen), int(h * self.margen)
+        alto, ancho = small.shape[:2]
+        return max(x - mx, 0), max(y - my, 0), min(x + w + mx, ancho), min(y + h + my, alto)
+
+    def _medir(self, inicio):
+        ahora = time.perf_counter()
+        latencia = 1000 * (ahora - inicio)
+        self.latencia_ms = latencia if not self.latencia_ms else 0.9 * self.latencia_ms + 0.1 * latencia
+        if self._ultimo is not None:
+            fps = 1.0 / max(ahora - self._ultimo, 1e-6)
+            self.fps = fps if not self.fps else 0.9 * self.fps + 0.1 * fps
+        self._ultimo = ahora
+
+
 # ============================
 # Clase para stream en vivo
 # ============================
-class FaceDetector(VideoTransformerBase):
-    def transform(self, frame):
-        img = frame.to_ndarray(format="bgr24")
-        return detect_faces(img)
+class FaceDetector(ProcesadorEnVivo):
+    def __init__(self, intervalo=5, escala=0.5, partes=()):
+        super().__init__()
+        self.seguidor = SeguidorCaras(intervalo, escala, partes=partes)
+
+    def procesar_imagen(self, img):
+        return self.seguidor.procesar(img, self.etapa)
 
 # ============================
 # App principal
@@ -41,6 +231,9 @@ def app():
         horizontal=True
     )
 
+    partes = st.multiselect("🧩 Partes del rostro a detectar (dentro de cada cara)", list(PARTES),
+                            default=["👁️ Ojos"])
+
     frame = None
 
     # ------------------------------
@@ -66,11 +259,27 @@ def app():
     # ------------------------------
     elif fuente == "📹 Video en vivo (Stream)":
         st.markdown("🎥 Streaming en vivo desde la cámara (usa WebRTC en el navegador).")
-        webrtc_streamer(
+        with st.expander("⚙️ Opciones de detección en vivo"):
+            intervalo = st.slider("🔁 Detectar cada N cuadros (seguimiento entre medio)", 1, 15, 5)
+            escala = st.slider("🔍 Escala del cuadro de detección", 0.25, 1.0, 0.5, 0.05)
+        ctx = webrtc_streamer(
             key="face-detector",
-            video_transformer_factory=FaceDetector,
+            video_processor_factory=lambda: FaceDetector(intervalo, escala, partes),
             media_stream_constraints={"video": True, "audio": False},
+            async_processing=True,
         )
+        # Los cambios en los controles se aplican al detector que ya está corriendo
+        if ctx.video_processor:
+            ctx.video_processor.seguidor.intervalo = intervalo
+            ctx.video_processor.seguidor.escala = escala
+            ctx.video_processor.seguidor.partes = partes
+        mostrar_metricas(ctx)
+
+        with st.expander("📊 Pool de clasificadores"):
+            st.caption("Instancias creadas por cascada (una por hilo que detecta a la vez) y "
+                       "tiempo de espera para obtener una. Se actualiza al interactuar con la página.")
+            st.button("🔄 Actualizar métricas")
+            st.table([{"cascada": nombre, **stats} for nombre, stats in stats_pools().items()])
 
     # ------------------------------
     # Procesamiento de imagen estática
@@ -80,7 +289,7 @@ def app():
         st.divider()
         st.subheader("🙂 Resultado de detección de caras")
 
-        output = detect_faces(frame.copy())
+        output = detect_faces(frame.copy(), partes)
         st.image(cv2.cvtColor(output, cv2.COLOR_BGR2RGB), caption="Caras detectadas", use_container_width=True)
 
         st.markdown("---\n✅ **Alumna:** 🦉Zanabria Yrigoin, Gaby Lizeth")
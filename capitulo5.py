@@ -1,6 +1,8 @@
 import streamlit as st
 import cv2
 import numpy as np
+import recursos
+from imagenes import cargar_imagen
 
 # =========================================
 # App principal para Capítulo 5
@@ -27,11 +29,10 @@ def app():
     # ===============================
     uploaded_file = st.file_uploader("📂 Sube una imagen", type=["jpg", "jpeg", "png"])
     if uploaded_file is not None:
-        file_bytes = np.asarray(bytearray(uploaded_file.read()), dtype=np.uint8)
-        img = cv2.imdecode(file_bytes, cv2.IMREAD_COLOR)
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        imagen = cargar_imagen(uploaded_file)
+        img, gray = imagen.bgr, imagen.gris
 
-        st.image(cv2.cvtColor(img, cv2.COLOR_BGR2RGB), caption="Imagen original", use_container_width=True)
+        st.image(imagen.vista(), caption="Imagen original", use_container_width=True)
 
         # ===============================
         # Algoritmos de extracción
@@ -39,8 +40,8 @@ def app():
         output = img.copy()
 
         if metodo == "FAST":
-            fast = cv2.FastFeatureDetector_create()
-            kp = fast.detect(gray, None)
+            with recursos.prestar("FAST") as fast:
+                kp = fast.detect(gray, None)
             cv2.drawKeypoints(img, kp, output, color=(0,255,0),
                               flags=cv2.DRAW_MATCHES_FLAGS_DRAW_RICH_KEYPOINTS)
 
@@ -58,8 +59,8 @@ def app():
             output[dst > 0.01 * dst.max()] = [0, 0, 255]
 
         elif metodo == "ORB":
-            orb = cv2.ORB_create()
-            kp, des = orb.detectAndCompute(gray, None)
+            with recursos.prestar("ORB") as orb:
+                kp, des = orb.detectAndCompute(gray, None)
             cv2.drawKeypoints(img, kp, output, color=(0,255,0),
                               flags=cv2.DRAW_MATCHES_FLAGS_DRAW_RICH_KEYPOINTS)
 
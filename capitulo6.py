@@ -1,7 +1,7 @@
 import streamlit as st
 import cv2
 import numpy as np
-from tempfile import NamedTemporaryFile
+from imagenes import cargar_imagen
 
 # ======================================================
 # Capítulo 6 — Seam Carving (Eliminación de Objetos)
@@ -17,16 +17,30 @@ def app():
     # ===============================
     uploaded_file = st.file_uploader("📂 Sube una imagen", type=["jpg", "jpeg", "png"])
     if uploaded_file is not None:
-        # Guardar en archivo temporal
-        temp_file = NamedTemporaryFile(delete=False)
-        temp_file.write(uploaded_file.read())
-        temp_file.close()
+        # Decodificada una sola vez por contenido, no en cada rerun
+        imagen = cargar_imagen(uploaded_file)
+        img_input = imagen.bgr
 
-        img_input = cv2.imread(temp_file.name)
+        modo = st.radio(
+            "🧮 Algoritmo de búsqueda de seams:",
+            ["Exacto (hasta 400 px)",
+             "Multirresolución (pirámide, resolución completa)",
+             "Por lotes (K seams por pasada, resolución completa)"],
+            horizontal=True,
+            help="El modo multirresolución busca cada seam en una versión reducida "
+                 "de la imagen y lo refina en un corredor estrecho en cada nivel. "
+                 "El modo por lotes extrae K seams que no se cruzan de cada pasada "
+                 "de programación dinámica."
+        )
+        batch_size = 1
+        if modo.startswith("Por lotes"):
+            batch_size = st.slider("🧩 Seams por pasada (K)", 2, 20, 5,
+                                   help="Más seams por pasada es más rápido, pero los seams "
+                                        "eliminados pueden tener más energía.")
 
-        # 🔹 Limitar tamaño máximo para evitar demoras
+        # 🔹 Limitar tamaño máximo para evitar demoras (solo en modo exacto)
         max_width = 400
-        if img_input.shape[1] > max_width:
+        if modo.startswith("Exacto") and img_input.shape[1] > max_width:
             scale = max_width / img_input.shape[1]
             img_input = cv2.resize(
                 img_input,
@@ -35,8 +49,14 @@ def app():
                 fy=scale,
                 interpolation=cv2.INTER_AREA
             )
+        pyramid_levels = 0
+        if modo.startswith("Multirresolución"):
+            pyramid_levels = pyramid_levels_for(img_input.shape[1], max_width)
 
-        img_rgb = cv2.cvtColor(img_input, cv2.COLOR_BGR2RGB)
+        if img_input is imagen.bgr:
+            img_rgb = imagen.vista()
+        else:
+            img_rgb = cv2.cvtColor(img_input, cv2.COLOR_BGR2RGB)
 
         # Mostrar original
         st.image(img_rgb, caption="📸 Imagen original (redimensionada si era muy grande)", use_container_width=True)
@@ -44,22 +64,42 @@ def app():
         # ===============================
         # Parámetros
         # ===============================
-        num_seams = st.slider("👉 Número de seams a eliminar", 10, 200, 50)
+        # El índice guarda en qué iteración se eliminó cada píxel; cualquier
+        # valor del slider hasta los seams calculados es una sola operación de
+        # máscara. A 400 px se calcula directamente hasta el máximo; a
+        # resolución completa solo cuando se pide y hasta el valor del slider.
+        max_seams = min(200, img_input.shape[1] - 1)
+        num_seams = st.slider("👉 Número de seams a eliminar", 0, max_seams, min(50, max_seams))
+
+        clave = (imagen.clave, img_input.shape[:2], pyramid_levels, batch_size)
+        if modo.startswith("Exacto"):
+            st.session_state.pop("seam_index", None)
+            calculados = max_seams
+            with st.spinner("⏳ Calculando el orden de eliminación de seams..."):
+                seam_order = cached_seam_index(img_input, clave, calculados, pyramid_levels, batch_size)
+        else:
+            # El índice a resolución completa se guarda en la sesión y no en la
+            # caché compartida: si esta lo expulsara, recalcularlo sin avisar
+            # costaría minutos con una foto grande.
+            clave_previa, calculados, seam_order = st.session_state.get("seam_index", (None, 0, None))
+            if clave_previa != clave:
+                st.session_state.pop("seam_index", None)
+                calculados, seam_order = 0, None
+            if st.button("🚀 Calcular seams", disabled=num_seams <= calculados):
+                with st.spinner(f"⏳ Calculando {num_seams} seams a resolución completa..."):
+                    seam_order = build_seam_index(img_input, num_seams, pyramid_levels, batch_size=batch_size)
+                seam_order.setflags(write=False)
+                calculados = num_seams
+                st.session_state["seam_index"] = (clave, calculados, seam_order)
+            if num_seams > calculados:
+                st.info(f"👆 Pulsa **Calcular seams** para eliminar {num_seams} seams "
+                        f"(calculados: {calculados}).")
 
         # ===============================
         # Procesar
         # ===============================
-        if st.button("🚀 Ejecutar Seam Carving"):
-            img = np.copy(img_input)
-            energy = compute_energy_matrix(img)
-            img_overlay_seam = np.copy(img_input)
-
-            # Proceso iterativo
-            for i in range(num_seams):
-                seam = find_vertical_seam(img, energy)
-                img_overlay_seam = overlay_vertical_seam(img_overlay_seam, seam)
-                img = remove_vertical_seam(img, seam)
-                energy = compute_energy_matrix(img)
+        if num_seams <= calculados:
+            img, img_overlay_seam = apply_seam_index(img_input, seam_order, num_seams)
 
             # Mostrar resultados
             st.image(cv2.cvtColor(img_overlay_seam, cv2.COLOR_BGR2RGB),
@@ -69,7 +109,26 @@ def app():
                      caption=f"🎯 Resultado final tras {num_seams} seams eliminados",
                      use_container_width=True)
 
-            st.success("✅ Procesamiento completado")
+            if batch_size > 1 and st.checkbox("📊 Comparar con el tallado secuencial (un seam por pasada)"):
+                # El tallado secuencial exacto a resolución completa tardaría
+                # minutos: ambos modos se comparan sobre la vista de 400 px,
+                # con la misma proporción del ancho eliminada.
+                img_proxy = imagen.proxy(max_width)
+                max_proxy = min(200, img_proxy.shape[1] - 1)
+                num_proxy = min(max_proxy, round(num_seams * img_proxy.shape[1] / img_input.shape[1]))
+                with st.spinner("⏳ Calculando el tallado secuencial..."):
+                    batch_order = cached_seam_index(img_proxy, (imagen.clave, img_proxy.shape[:2], 0, batch_size),
+                                                    max_proxy, 0, batch_size)
+                    sequential_order = cached_seam_index(img_proxy, (imagen.clave, img_proxy.shape[:2], 0, 1),
+                                                         max_proxy)
+                energy = compute_energy_matrix(img_proxy)
+                batch_cost = removed_energy(energy, batch_order, num_proxy)
+                sequential_cost = removed_energy(energy, sequential_order, num_proxy)
+                diff = 100 * (batch_cost - sequential_cost) / max(sequential_cost, 1)
+                st.metric(f"⚡ Energía eliminada (por lotes, {num_proxy} seams a "
+                          f"{img_proxy.shape[1]} px)", f"{batch_cost:,}",
+                          delta=f"{diff:+.1f}% vs secuencial ({sequential_cost:,})",
+                          delta_color="inverse")
 
     st.markdown("---\n✅ **Alumna:** 🦉 Zanabria Yrigoin, Gaby Lizeth")
 
@@ -77,52 +136,282 @@ def app():
 # ===============================
 # Funciones auxiliares
 # ===============================
-def overlay_vertical_seam(img, seam):
-    img_seam_overlay = np.copy(img)
-    for row in range(len(seam)):
-        col = int(seam[row])
-        img_seam_overlay[row, col] = (0, 255, 0)  # Verde para los seams
-    return img_seam_overlay
-
 def compute_energy_matrix(img):
     gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    return compute_energy_from_gray(gray)
+
+def compute_energy_from_gray(gray):
     sobel_x = cv2.Sobel(gray, cv2.CV_64F, 1, 0, ksize=3)
     sobel_y = cv2.Sobel(gray, cv2.CV_64F, 0, 1, ksize=3)
     abs_sobel_x = cv2.convertScaleAbs(sobel_x)
     abs_sobel_y = cv2.convertScaleAbs(sobel_y)
     return cv2.addWeighted(abs_sobel_x, 0.5, abs_sobel_y, 0.5, 0)
 
-def find_vertical_seam(img, energy):
-    rows, cols = img.shape[:2]
-    seam = np.zeros(rows)
+def update_energy_matrix(gray, energy, seam, block_rows=32):
+    """
+    Actualiza la energía tras eliminar ``seam`` sin recalcular toda la imagen.
+    Solo cambia el gradiente de los píxeles cuya vecindad 3x3 tocaba el seam,
+    así que se recalcula Sobel únicamente en esa franja y el resto se copia
+    desplazado. El resultado es idéntico a ``compute_energy_from_gray``.
+    Devuelve ``(gray, energy)`` ya recortados.
+    """
+    gray = remove_vertical_seam(gray, seam)
+    energy = remove_vertical_seam(energy, seam)
+    rows, cols = gray.shape
+
+    # Columnas del seam en la fila anterior, actual y siguiente
+    seam = seam.astype(np.intp)
+    window = np.stack([np.r_[seam[:1], seam[:-1]], seam, np.r_[seam[1:], seam[-1:]]])
+    seam_min, seam_max = window.min(axis=0), window.max(axis=0)
+
+    for r0 in range(0, rows, block_rows):
+        r1 = min(r0 + block_rows, rows)
+        # Franja a recalcular en coordenadas de la imagen ya recortada
+        c0 = max(int(seam_min[r0:r1].min()) - 1, 0)
+        c1 = min(int(seam_max[r0:r1].max()) + 1, cols)
+        if c0 >= c1:
+            continue
+        # Parche con un píxel de margen; en los bordes de la imagen el
+        # parche coincide con el borde y el reflejo de Sobel es el mismo.
+        pr0, pr1 = max(r0 - 1, 0), min(r1 + 1, rows)
+        pc0, pc1 = max(c0 - 1, 0), min(c1 + 1, cols)
+        patch = compute_energy_from_gray(gray[pr0:pr1, pc0:pc1])
+        energy[r0:r1, c0:c1] = patch[r0 - pr0:r1 - pr0, c0 - pc0:c1 - pc0]
+    return gray, energy
+
+def cumulative_energy(energy):
+    """
+    Programación dinámica del seam vertical, una fila completa por paso con
+    operaciones de NumPy. Devuelve la energía acumulada de la última fila y
+    ``edge_to`` (int8, desplazamiento -1/0/1 hacia la columna padre).
+    """
+    rows, cols = energy.shape[:2]
+
+    # Energía acumulada de la fila actual, con un borde de inf a cada lado
+    # para que los vecinos fuera de la imagen nunca sean elegidos.
+    dist_to = np.full(cols + 2, float('inf'))
+    dist_to[1:-1] = 0
+    edge_to = np.zeros((rows, cols), dtype=np.int8)
+    candidates = np.empty((3, cols))
+
+    for row in range(1, rows):
+        # Mismo orden de desempate que el recorrido original: izquierda,
+        # centro y derecha (argmin devuelve el primer mínimo).
+        candidates[0] = dist_to[:-2]
+        candidates[1] = dist_to[1:-1]
+        candidates[2] = dist_to[2:]
+        choice = candidates.argmin(axis=0)
+        edge_to[row] = choice - 1
+        np.add(candidates.min(axis=0), energy[row], out=dist_to[1:-1])
+
+    return dist_to[1:-1], edge_to
+
+def backtrack_seam(edge_to, end_col):
+    """Reconstruye el seam que termina en la columna ``end_col``."""
+    rows = edge_to.shape[0]
+    seam = np.zeros(rows, dtype=np.intp)
+    seam[rows-1] = end_col
+    for i in range(rows - 1, 0, -1):
+        seam[i-1] = seam[i] + edge_to[i, seam[i]]
+    return seam
+
+def find_vertical_seam(energy):
+    """
+    Busca el seam vertical de menor energía con programación dinámica.
+    """
+    dist_to, edge_to = cumulative_energy(energy)
+    return backtrack_seam(edge_to, np.argmin(dist_to))
+
+def find_vertical_seams(energy, k):
+    """
+    Extrae ``k`` seams disjuntos y que no se cruzan de una sola pasada de
+    programación dinámica. Parten de los finales de menor energía acumulada
+    (primero los mínimos locales de la última fila) y se reconstruyen juntos
+    fila a fila: cada seam sigue a su padre óptimo salvo que choque con un
+    vecino, en cuyo caso se desvía lo mínimo para mantener el orden estricto
+    de columnas. Se devuelven de menor a mayor energía acumulada.
+    """
+    rows, cols = energy.shape[:2]
+    k = min(k, cols)
+    dist_to, edge_to = cumulative_energy(energy)
+    offset = np.arange(k)
 
-    dist_to = np.zeros((rows, cols)) + float('inf')
-    dist_to[0, :] = np.zeros(cols)
-    edge_to = np.zeros((rows, cols))
+    padded = np.r_[np.inf, dist_to, np.inf]
+    is_min = (dist_to <= padded[:-2]) & (dist_to <= padded[2:])
+    order = np.argsort(dist_to, kind='stable')
+    ends = np.concatenate([order[is_min[order]], order[~is_min[order]]])[:k]
 
-    for row in range(rows - 1):
-        for col in range(cols):
-            if col != 0 and dist_to[row+1, col-1] > dist_to[row, col] + energy[row+1, col-1]:
-                dist_to[row+1, col-1] = dist_to[row, col] + energy[row+1, col-1]
-                edge_to[row+1, col-1] = 1
+    seams = np.zeros((rows, k), dtype=np.intp)
+    seams[rows-1] = np.sort(ends)
+    for i in range(rows - 1, 0, -1):
+        parents = seams[i] + edge_to[i, seams[i]]
+        # parents[j] > parents[j-1] y parents[j] <= cols-k+j; como cada seam
+        # está a distancia 1 de su padre preferido, el ajuste nunca rompe
+        # la conectividad.
+        shifted = np.maximum.accumulate(parents - offset)
+        shifted = np.minimum.accumulate(np.minimum(shifted, cols - k)[::-1])[::-1]
+        seams[i-1] = shifted + offset
+    # La reconstrucción necesita el orden por columna; quien los numere, el de costo
+    return seams.T[np.argsort(dist_to[seams[rows-1]], kind='stable')]
 
-            if dist_to[row+1, col] > dist_to[row, col] + energy[row+1, col]:
-                dist_to[row+1, col] = dist_to[row, col] + energy[row+1, col]
-                edge_to[row+1, col] = 0
+def find_vertical_seam_in_corridor(energy, center, radius):
+    """
+    Igual que ``find_vertical_seam`` pero solo explora, en cada fila, las
+    columnas ``center[row] ± radius``. Se usa para refinar un seam proyectado
+    desde un nivel más grueso de la pirámide.
+    """
+    rows, cols = energy.shape[:2]
+    width = min(2 * radius + 1, cols)
+    lo = np.clip(np.asarray(center, dtype=np.intp) - radius, 0, cols - width)
+    band = energy[np.arange(rows)[:, None], lo[:, None] + np.arange(width)]
 
-            if col != cols-1 and dist_to[row+1, col+1] > dist_to[row, col] + energy[row+1, col+1]:
-                dist_to[row+1, col+1] = dist_to[row, col] + energy[row+1, col+1]
-                edge_to[row+1, col+1] = -1
+    # Desplazamiento de la franja entre filas consecutivas; el relleno con inf
+    # hace que los padres fuera de la franja anterior nunca sean elegidos.
+    shift = np.diff(lo, prepend=lo[0])
+    pad = int(np.abs(shift).max()) + 1
+    dist_to = np.full(width + 2 * pad, float('inf'))
+    dist_to[pad:pad + width] = 0
+    edge_to = np.zeros((rows, width), dtype=np.int8)
+    candidates = np.empty((3, width))
 
-    seam[rows-1] = np.argmin(dist_to[rows-1, :])
-    for i in (x for x in reversed(range(rows)) if x > 0):
-        seam[i-1] = seam[i] + edge_to[i, int(seam[i])]
+    for row in range(1, rows):
+        start = pad + shift[row] - 1
+        candidates[0] = dist_to[start:start + width]
+        candidates[1] = dist_to[start + 1:start + 1 + width]
+        candidates[2] = dist_to[start + 2:start + 2 + width]
+        choice = candidates.argmin(axis=0)
+        edge_to[row] = choice - 1
+        np.add(candidates.min(axis=0), band[row], out=dist_to[pad:pad + width])
+
+    seam = np.zeros(rows, dtype=np.intp)
+    k = int(np.argmin(dist_to[pad:pad + width]))
+    seam[rows-1] = lo[rows-1] + k
+    for i in range(rows - 1, 0, -1):
+        seam[i-1] = seam[i] + edge_to[i, seam[i] - lo[i]]
+    return seam
+
+def pyramid_levels_for(width, base_width=400):
+    """Número de reducciones a la mitad hasta que el ancho sea <= base_width."""
+    levels = 0
+    while width > base_width:
+        width = (width + 1) // 2
+        levels += 1
+    return levels
+
+def find_vertical_seam_pyramid(energy, levels, radius=8):
+    """
+    Búsqueda multirresolución: el seam se calcula con la DP completa en el
+    nivel más pequeño de la pirámide de energía y se proyecta hacia arriba,
+    refinándolo en cada nivel dentro de un corredor de ``radius`` columnas.
+    """
+    pyramid = [energy]
+    for _ in range(levels):
+        h, w = pyramid[-1].shape[:2]
+        pyramid.append(cv2.resize(pyramid[-1], ((w + 1) // 2, (h + 1) // 2),
+                                  interpolation=cv2.INTER_AREA))
+
+    seam = find_vertical_seam(pyramid[-1])
+    for level_energy in reversed(pyramid[:-1]):
+        rows = level_energy.shape[0]
+        center = 2 * seam[np.arange(rows) // 2]
+        seam = find_vertical_seam_in_corridor(level_energy, center, radius)
     return seam
 
 def remove_vertical_seam(img, seam):
+    """
+    Elimina un seam vertical en una sola operación de máscara booleana.
+    Funciona con imágenes a color, en gris o matrices 2D (energía, índices).
+    """
+    return remove_vertical_seams(img, np.asarray(seam)[None])
+
+def remove_vertical_seams(img, seams):
+    """Elimina a la vez varios seams disjuntos (matriz ``k x rows``)."""
+    rows, cols = img.shape[:2]
+    keep = np.ones((rows, cols), dtype=bool)
+    keep[np.arange(rows), seams.astype(np.intp)] = False
+    return compact_pixels(img, keep)
+
+def compact_pixels(img, keep):
+    """
+    Conserva los píxeles marcados en ``keep`` (el mismo número por fila)
+    y devuelve la imagen más estrecha resultante.
+    """
     rows, cols = img.shape[:2]
-    for row in range(rows):
-        for col in range(int(seam[row]), cols - 1):
-            img[row, col] = img[row, col + 1]
-    img = img[:, 0:cols - 1]
-    return img
+    new_cols = int(np.count_nonzero(keep[0]))
+    if img.ndim == 2:
+        return img[keep].reshape(rows, new_cols)
+    # Con canales, compress sobre filas de píxeles es bastante más rápido
+    # que indexar el arreglo 3D con la máscara.
+    pixels = img.reshape(rows * cols, -1)
+    return np.compress(keep.ravel(), pixels, axis=0).reshape((rows, new_cols) + img.shape[2:])
+
+def build_seam_index(img_input, max_seams, pyramid_levels=0, radius=8, batch_size=1):
+    """
+    Elimina ``max_seams`` seams una sola vez y devuelve una matriz con la
+    iteración en que se eliminó cada píxel (``max_seams`` si se conserva).
+    Con ``pyramid_levels > 0`` los seams se buscan en modo multirresolución;
+    con ``batch_size > 1`` se extraen hasta ``batch_size`` seams por pasada.
+    """
+    rows, cols = img_input.shape[:2]
+    row_idx = np.arange(rows)
+    seam_order = np.full((rows, cols), max_seams, dtype=np.int32)
+    # Columna original de cada píxel de la imagen recortada
+    col_map = np.broadcast_to(np.arange(cols, dtype=np.int32), (rows, cols))
+
+    # Solo hace falta recortar el gris, la energía y el mapa de columnas:
+    # la búsqueda de seams no usa los colores
+    gray = cv2.cvtColor(img_input, cv2.COLOR_BGR2GRAY)
+    energy = compute_energy_from_gray(gray)
+    i = 0
+    while i < max_seams:
+        if batch_size > 1:
+            seams = find_vertical_seams(energy, min(batch_size, max_seams - i))
+        elif pyramid_levels > 0:
+            seams = find_vertical_seam_pyramid(energy, pyramid_levels, radius)[None]
+        else:
+            seams = find_vertical_seam(energy)[None]
+        # Dentro de un lote, cada seam recibe su propia iteración en el orden
+        # de ``find_vertical_seams`` (de menor a mayor energía acumulada): un
+        # prefijo que corta un lote se queda con sus seams más baratos.
+        for seam in seams:
+            seam_order[row_idx, col_map[row_idx, seam]] = i
+            i += 1
+        col_map = remove_vertical_seams(col_map, seams)
+        if len(seams) == 1:
+            gray, energy = update_energy_matrix(gray, energy, seams[0])
+        else:
+            gray = remove_vertical_seams(gray, seams)
+            energy = compute_energy_from_gray(gray)
+    return seam_order
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def cached_seam_index(_img_input, clave, max_seams, pyramid_levels=0, batch_size=1):
+    # cache_resource comparte el arreglo sin copiarlo en cada rerun (cache_data
+    # lo serializaría entero); por eso se devuelve de solo lectura. La imagen
+    # no se hashea: ``clave`` ya identifica el contenido y su tamaño.
+    seam_order = build_seam_index(_img_input, max_seams, pyramid_levels, batch_size=batch_size)
+    seam_order.setflags(write=False)
+    return seam_order
+
+def removed_energy(energy, seam_order, num_seams):
+    """Energía (de la imagen original) de los píxeles eliminados."""
+    return int(energy[seam_order < num_seams].sum(dtype=np.int64))
+
+def apply_seam_index(img_input, seam_order, num_seams):
+    """
+    Obtiene el resultado para ``num_seams`` (<= máximo del índice) con una
+    máscara: la imagen recortada y la original con los seams en verde.
+    """
+    removed = seam_order < num_seams
+    img = compact_pixels(img_input, ~removed)
+    img_overlay_seam = np.copy(img_input)
+    img_overlay_seam[removed] = (0, 255, 0)  # Verde para los seams
+    return img, img_overlay_seam
+
+def carve_vertical_seams(img_input, num_seams):
+    """
+    Elimina ``num_seams`` seams verticales y devuelve la imagen recortada
+    junto con la original marcando, en sus coordenadas, los seams quitados.
+    """
+    seam_order = build_seam_index(img_input, num_seams)
+    return apply_seam_index(img_input, seam_order, num_seams)
@@ -1,7 +1,7 @@
 import streamlit as st
 import cv2
 import numpy as np
-from tempfile import NamedTemporaryFile
+from imagenes import cargar_imagen
 
 # ======================================================
 # Capítulo 7 — Segmentación de Imágenes (GrabCut / Contornos / Watershed)
@@ -19,14 +19,10 @@ def app():
                           ["GrabCut", "Contornos", "Watershed"])
 
     if uploaded_file is not None:
-        temp_file = NamedTemporaryFile(delete=False)
-        temp_file.write(uploaded_file.read())
-        temp_file.close()
+        imagen = cargar_imagen(uploaded_file)
+        img, img_rgb = imagen.bgr, imagen.rgb
 
-        img = cv2.imread(temp_file.name)
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-
-        st.image(img_rgb, caption="📸 Imagen original", use_container_width=True)
+        st.image(imagen.vista(), caption="📸 Imagen original", use_container_width=True)
 
         if metodo == "GrabCut":
             st.subheader("✂️ Selecciona el rectángulo de interés con sliders interactivos")
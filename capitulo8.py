@@ -2,7 +2,12 @@ import streamlit as st
 import cv2
 import numpy as np
 from tempfile import NamedTemporaryFile
-import time
+from video_pipeline import VideoPipeline, FrameContext, DisplaySink, SIN_BUFFERS, formatear_stats
+from motion_index import MotionIndex, MotionIndexBuilder, ruta_indice, leer_cuadros
+import os
+
+# Métodos cuyo resultado es una máscara de movimiento indexable
+METODOS_MOVIMIENTO = ["Sustracción de Fondo (MOG2)", "Diferencia de Cuadros (Movimiento)"]
 
 # ======================================================
 # Capítulo 8 — Detección de Movimiento y Color (OpenCV)
@@ -26,74 +31,156 @@ def app():
     if fuente == "Subir archivo":
         video_file = st.file_uploader("📂 Sube un video (MP4, AVI, MOV)", type=["mp4", "avi", "mov"])
 
+    with st.expander("⚙️ Opciones de reproducción"):
+        target_fps = st.slider("🎞️ FPS de visualización", 5, 60, 15,
+                               help="Solo limita las actualizaciones de la página; el video se "
+                                    "procesa a toda velocidad.")
+        ancho_vista = st.select_slider("🖼️ Ancho de la vista previa (px)", [320, 480, 640, 960], 640)
+        drop_oldest = st.checkbox("⏩ Descartar cuadros atrasados (menor latencia)",
+                                  value=(fuente == "Cámara"),
+                                  help="Si el procesamiento no alcanza al video, se descartan los "
+                                       "cuadros más antiguos en lugar de esperar.")
+
     iniciar = st.button("🚀 Iniciar Detección")
 
     if iniciar:
         if fuente == "Cámara":
             cap = cv2.VideoCapture(0)
-            ejecutar_metodo(cap, metodo)
+            ejecutar_metodo(cap, metodo, target_fps, drop_oldest, ancho_vista=ancho_vista)
         elif video_file:
             temp_file = NamedTemporaryFile(delete=False)
             temp_file.write(video_file.read())
+            temp_file.close()
             cap = cv2.VideoCapture(temp_file.name)
-            ejecutar_metodo(cap, metodo)
+            ejecutar_metodo(cap, metodo, target_fps, drop_oldest, ruta_video=temp_file.name,
+                            ancho_vista=ancho_vista)
         else:
             st.warning("⚠️ Por favor, selecciona una fuente de video antes de iniciar.")
 
+    ruta_video = st.session_state.get("capitulo8_video_indexado")
+    if fuente == "Subir archivo" and ruta_video and os.path.exists(ruta_indice(ruta_video)):
+        buscar_movimiento(ruta_video)
+
     st.markdown("---\n✅ **Alumna:** 🦉 Zanabria Yrigoin, Gaby Lizeth")
 
 
 # ======================================================
 # Función principal de ejecución
 # ======================================================
-def ejecutar_metodo(cap, metodo):
+def ejecutar_metodo(cap, metodo, target_fps=15, drop_oldest=True, ruta_video=None, ancho_vista=640):
     scaling_factor = 0.5
 
     stframe1 = st.empty()
     stframe2 = st.empty()
+    stats_placeholder = st.empty()
+
+    # Para archivos se construye el índice de movimiento mientras se procesa
+    indice = None
+    if ruta_video and metodo in METODOS_MOVIMIENTO:
+        indice = MotionIndexBuilder(fps=cap.get(cv2.CAP_PROP_FPS) or 30.0, escala=scaling_factor)
+
+    if metodo == "Diferencia de Cuadros (Movimiento)":
+        stats = procesar_diferencia_streamlit(cap, stframe1, stframe2, scaling_factor, target_fps,
+                                              drop_oldest, indice, ancho_vista)
+    else:
+        ctx = FrameContext(n_salidas=1)
+        stats = procesar_video_streamlit(cap, metodo, crear_procesador(metodo, ctx=ctx),
+                                         stframe1, stframe2, scaling_factor, target_fps, drop_oldest,
+                                         ctx, indice, ancho_vista)
+
+    cap.release()
+    stats_placeholder.caption(formatear_stats(stats))
 
+    if indice is not None:
+        indice.construir().guardar(ruta_indice(ruta_video))
+        st.session_state["capitulo8_video_indexado"] = ruta_video
+        st.success("🗂️ Índice de movimiento guardado: ya puedes buscar los cuadros con movimiento.")
+
+
+# ======================================================
+# Búsqueda de movimiento con el índice guardado
+# ======================================================
+def buscar_movimiento(ruta_video):
+    indice = MotionIndex.cargar(ruta_indice(ruta_video))
+    st.subheader("🔎 Buscar cuadros con movimiento")
+
+    puntuacion = st.slider("📈 Fracción mínima de píxeles en movimiento (%)", 0.0, 5.0, 0.1, step=0.05)
+    cuadros = indice.cuadros_con_movimiento(puntuacion_minima=puntuacion / 100)
+    segmentos = indice.segmentos(cuadros, separacion_maxima=int(indice.fps // 2))
+    st.write(f"🎞️ **{len(cuadros)}** de {len(indice)} cuadros con movimiento "
+             f"en **{len(segmentos)}** tramos.")
+    if len(cuadros) == 0:
+        return
+
+    cuadro = st.select_slider("Cuadro", options=cuadros.tolist(),
+                              format_func=lambda c: f"#{c} ({indice.tiempo_de(c):.1f} s)")
+    for _, imagen in leer_cuadros(ruta_video, [cuadro]):
+        for (x, y, w, h) in indice.cajas_de(cuadro):
+            cv2.rectangle(imagen, (int(x), int(y)), (int(x + w), int(y + h)), (0, 255, 0), 2)
+        st.image(cv2.cvtColor(imagen, cv2.COLOR_BGR2RGB),
+                 caption=f"🟩 Regiones en movimiento — cuadro #{cuadro}", use_container_width=True)
+
+
+def crear_procesador(metodo, scaling_factor=1.0, ctx=None):
+    """
+    Devuelve ``procesador(frame) -> (original, resultado, mascara)`` para el
+    método, con su propio estado (sustractor de fondo, historial de cuadros...).
+    ``mascara`` es el primer plano binario (0/255) del cuadro: es lo que se
+    indexa y se cuenta, no la imagen de resultado que se muestra.
+    La diferencia de cuadros devuelve ``None`` mientras llena el historial.
+    Con ``ctx`` (``FrameContext``) las salidas se escriben en buffers reusados.
+    """
     if metodo == "Sustracción de Fondo (GMG)":
         bgSubtractor = cv2.bgsegm.createBackgroundSubtractorGMG()
         kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (3, 3))
-        procesar_video_streamlit(cap, metodo, lambda f: procesar_gmg(f, bgSubtractor, kernel),
-                                 stframe1, stframe2, scaling_factor)
+        return lambda f: procesar_gmg(f, bgSubtractor, kernel)
 
     elif metodo == "Sustracción de Fondo (MOG2)":
         bgSubtractor = cv2.createBackgroundSubtractorMOG2()
         history = 100
-        procesar_video_streamlit(cap, metodo, lambda f: procesar_mog2(f, bgSubtractor, history),
-                                 stframe1, stframe2, scaling_factor)
+        return lambda f: procesar_mog2(f, bgSubtractor, history, ctx)
 
     elif metodo == "Detección de Color (Azul)":
         lower = np.array([60, 100, 100])
         upper = np.array([180, 255, 255])
-        procesar_video_streamlit(cap, metodo, lambda f: procesar_color(f, lower, upper),
-                                 stframe1, stframe2, scaling_factor)
+        return lambda f: procesar_color(f, lower, upper, ctx)
 
     elif metodo == "Diferencia de Cuadros (Movimiento)":
-        procesar_diferencia_streamlit(cap, stframe1, stframe2, scaling_factor)
+        return DiferenciaCuadros(scaling_factor, ctx)
 
-    cap.release()
+    raise ValueError(f"Método desconocido: {metodo}")
+
+
+def redimensionar(frame, scaling_factor, ctx=None):
+    """Reduce el cuadro escribiendo en un buffer de salida del contexto."""
+    ctx = ctx or SIN_BUFFERS
+    h, w = frame.shape[:2]
+    dsize = (int(round(w * scaling_factor)), int(round(h * scaling_factor)))
+    return cv2.resize(frame, dsize, dst=ctx.salida("frame", (dsize[1], dsize[0]) + frame.shape[2:]))
 
 
 # ======================================================
 # Procesamiento de video dentro de Streamlit
 # ======================================================
-def procesar_video_streamlit(cap, metodo, procesador, stframe1, stframe2, scaling_factor):
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        frame = cv2.resize(frame, None, fx=scaling_factor, fy=scaling_factor)
-        original, resultado = procesador(frame)
-
-        stframe1.image(cv2.cvtColor(original, cv2.COLOR_BGR2RGB),
-                       caption="🎥 Cámara - " + metodo, channels="RGB", use_container_width=True)
-        stframe2.image(cv2.cvtColor(resultado, cv2.COLOR_BGR2RGB),
-                       caption="🔍 Resultado - " + metodo, channels="RGB", use_container_width=True)
-
-        time.sleep(0.03)  # Control de velocidad
+def procesar_video_streamlit(cap, metodo, procesador, stframe1, stframe2, scaling_factor,
+                             target_fps=15, drop_oldest=True, ctx=None, indice=None, ancho_vista=640):
+    ctx = ctx or SIN_BUFFERS
+    sink = DisplaySink([stframe1, stframe2],
+                       ["🎥 Cámara - " + metodo, "🔍 Resultado - " + metodo],
+                       max_fps=target_fps, ancho_max=ancho_vista)
+
+    def procesar(frame):
+        ctx.siguiente()
+        frame = redimensionar(frame, scaling_factor, ctx)
+        original, imagen, mascara = procesador(frame)
+        if indice is not None:
+            indice.agregar(pipeline.cuadro_actual, mascara)
+        # Se codifica en este hilo, mientras los buffers del cuadro siguen siendo válidos
+        return sink.preparar([original, imagen])
+
+    # El ritmo lo pone el sink: la tubería no espera entre cuadros
+    pipeline = VideoPipeline(cap, procesar, sink.mostrar, target_fps=0, drop_oldest=drop_oldest)
+    return {**pipeline.run(), **sink.stats()}
 
 
 # ======================================================
@@ -103,49 +190,96 @@ def procesar_gmg(frame, bgSubtractor, kernel):
     mask = bgSubtractor.apply(frame)
     mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
     mask_rgb = cv2.cvtColor(mask, cv2.COLOR_GRAY2BGR)
-    return frame, mask_rgb
-
-
-def procesar_mog2(frame, bgSubtractor, history):
-    mask = bgSubtractor.apply(frame, learningRate=1.0 / history)
-    mask_rgb = cv2.cvtColor(mask, cv2.COLOR_GRAY2BGR)
-    combined = cv2.bitwise_and(frame, mask_rgb)
-    return frame, combined
-
-
-def procesar_color(frame, lower, upper):
-    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV)
-    mask = cv2.inRange(hsv, lower, upper)
-    res = cv2.bitwise_and(frame, frame, mask=mask)
-    res = cv2.medianBlur(res, 5)
-    return frame, res
+    return frame, mask_rgb, mask
+
+
+def procesar_mog2(frame, bgSubtractor, history, ctx=None):
+    ctx = ctx or SIN_BUFFERS
+    mask = bgSubtractor.apply(frame, fgmask=ctx.trabajo("mask", frame.shape[:2]),
+                              learningRate=1.0 / history)
+    # MOG2 marca las sombras con 127: solo 255 es primer plano
+    _, fg = cv2.threshold(mask, 254, 255, cv2.THRESH_BINARY, dst=ctx.salida("fg", frame.shape[:2]))
+    mask_rgb = cv2.cvtColor(fg, cv2.COLOR_GRAY2BGR, dst=ctx.trabajo("mask_rgb", frame.shape))
+    combined = cv2.bitwise_and(frame, mask_rgb, dst=ctx.salida("combined", frame.shape))
+    return frame, combined, fg
+
+
+def procesar_color(frame, lower, upper, ctx=None):
+    ctx = ctx or SIN_BUFFERS
+    hsv = cv2.cvtColor(frame, cv2.COLOR_BGR2HSV, dst=ctx.trabajo("hsv", frame.shape))
+    mask = cv2.inRange(hsv, lower, upper, dst=ctx.salida("mask", frame.shape[:2]))
+    # Con máscara, bitwise_and no toca los píxeles fuera de ella: un buffer
+    # reutilizado debe ponerse a cero antes.
+    res = ctx.trabajo("color", frame.shape)
+    if res is not None:
+        res.fill(0)
+    res = cv2.bitwise_and(frame, frame, dst=res, mask=mask)
+    res = cv2.medianBlur(res, 5, dst=ctx.salida("color_blur", frame.shape))
+    return frame, res, mask
 
 
 # ======================================================
 # Detección de movimiento con diferencia de cuadros
 # ======================================================
-def procesar_diferencia_streamlit(cap, stframe1, stframe2, scaling_factor):
-    prev_frame, cur_frame, next_frame = None, None, None
-
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        frame = cv2.resize(frame, None, fx=scaling_factor, fy=scaling_factor)
-        prev_frame = cur_frame
-        cur_frame = next_frame
-        next_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-
-        if prev_frame is not None:
-            diff1 = cv2.absdiff(next_frame, cur_frame)
-            diff2 = cv2.absdiff(cur_frame, prev_frame)
-            motion = cv2.bitwise_and(diff1, diff2)
-            motion_rgb = cv2.cvtColor(motion, cv2.COLOR_GRAY2BGR)
-
-            stframe1.image(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB),
-                           caption="🎥 Cámara", channels="RGB", use_container_width=True)
-            stframe2.image(cv2.cvtColor(motion_rgb, cv2.COLOR_BGR2RGB),
-                           caption="📸 Movimiento Detectado", channels="RGB", use_container_width=True)
-
-        time.sleep(0.03)
+class DiferenciaCuadros:
+    """
+    Procesador con estado para la diferencia de cuadros: guarda los tres
+    últimos cuadros en gris y devuelve ``None`` hasta tener historial.
+    Con un ``FrameContext`` los grises viven en un anillo preasignado que se
+    rota por índice (prev/cur/next) y las salidas se escriben con ``dst=``.
+    La máscara de movimiento es la diferencia umbralizada en ``umbral``: sin
+    él, el ruido del sensor cuenta como movimiento.
+    """
+
+    def __init__(self, scaling_factor, ctx=None, umbral=25):
+        self.scaling_factor = scaling_factor
+        self.umbral = umbral
+        self.ctx = ctx or SIN_BUFFERS
+        self.grises = [None, None, None]
+        self.indice = 0
+        self.vistos = 0
+
+    def __call__(self, frame):
+        ctx = self.ctx
+        ctx.siguiente()
+        if self.scaling_factor != 1.0:
+            frame = redimensionar(frame, self.scaling_factor, ctx)
+
+        # El cuadro más nuevo reemplaza al más antiguo del anillo
+        self.indice = (self.indice + 1) % 3
+        anillo = ctx.trabajo("grises", (3,) + frame.shape[:2])
+        destino = anillo[self.indice] if anillo is not None else None
+        self.grises[self.indice] = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=destino)
+        self.vistos += 1
+        if self.vistos < 3:
+            return None
+
+        next_frame = self.grises[self.indice]
+        cur_frame = self.grises[self.indice - 1]
+        prev_frame = self.grises[self.indice - 2]
+        diff1 = cv2.absdiff(next_frame, cur_frame, dst=ctx.trabajo("diff1", frame.shape[:2]))
+        diff2 = cv2.absdiff(cur_frame, prev_frame, dst=ctx.trabajo("diff2", frame.shape[:2]))
+        motion = cv2.bitwise_and(diff1, diff2, dst=ctx.trabajo("motion", frame.shape[:2]))
+        motion_rgb = cv2.cvtColor(motion, cv2.COLOR_GRAY2BGR, dst=ctx.salida("motion_rgb", frame.shape))
+        _, mascara = cv2.threshold(motion, self.umbral, 255, cv2.THRESH_BINARY,
+                                   dst=ctx.salida("motion_mask", frame.shape[:2]))
+        return frame, motion_rgb, mascara
+
+
+def procesar_diferencia_streamlit(cap, stframe1, stframe2, scaling_factor,
+                                  target_fps=15, drop_oldest=True, indice=None, ancho_vista=640):
+    diferencia = DiferenciaCuadros(scaling_factor, FrameContext(n_salidas=1))
+    sink = DisplaySink([stframe1, stframe2], ["🎥 Cámara", "📸 Movimiento Detectado"],
+                       max_fps=target_fps, ancho_max=ancho_vista)
+
+    def procesar(frame):
+        resultado = diferencia(frame)
+        if resultado is None:
+            return None
+        original, imagen, mascara = resultado
+        if indice is not None:
+            indice.agregar(pipeline.cuadro_actual, mascara)
+        return sink.preparar([original, imagen])
+
+    pipeline = VideoPipeline(cap, procesar, sink.mostrar, target_fps=0, drop_oldest=drop_oldest)
+    return {**pipeline.run(), **sink.stats()}
@@ -1,6 +1,7 @@
 import streamlit as st
 import cv2
 import numpy as np
+import recursos
 
 # ======================================================
 # 📘 Capítulo 9 — Clasificación de Imágenes (SIFT + Comparación)
@@ -49,22 +50,21 @@ def app():
 
 def comparar_sift(img1, img2):
     """Compara dos imágenes usando SIFT y muestra los emparejamientos."""
-    sift = cv2.SIFT_create()
-
     # Convertir a escala de grises
     gray1 = cv2.cvtColor(img1, cv2.COLOR_BGR2GRAY)
     gray2 = cv2.cvtColor(img2, cv2.COLOR_BGR2GRAY)
 
-    # Detectar keypoints y descriptores
-    kp1, des1 = sift.detectAndCompute(gray1, None)
-    kp2, des2 = sift.detectAndCompute(gray2, None)
+    # Detectar keypoints y descriptores (SIFT del registro del proceso)
+    with recursos.prestar("SIFT") as sift:
+        kp1, des1 = sift.detectAndCompute(gray1, None)
+        kp2, des2 = sift.detectAndCompute(gray2, None)
 
     if des1 is None or des2 is None:
         return "No se detectaron suficientes características.", img1
 
-    # Crear el comparador (BFMatcher)
-    bf = cv2.BFMatcher(cv2.NORM_L2, crossCheck=True)
-    matches = bf.match(des1, des2)
+    # Comparador (BFMatcher) reutilizado entre comparaciones
+    with recursos.prestar("BFMatcher L2") as bf:
+        matches = bf.match(des1, des2)
 
     # Ordenar los mejores matches
     matches = sorted(matches, key=lambda x: x.distance)
@@ -0,0 +1,31 @@
+from recursos import registrar_cascada, stats_recursos
+
+# ======================================================
+# Pool de clasificadores en cascada
+# ======================================================
+# streamlit-webrtc llama a ``transform`` de cada espectador desde su propio
+# hilo. Un único ``cv2.CascadeClassifier`` global compartido por todos no es
+# seguro para uso concurrente, así que cada hilo toma prestada su propia
+# instancia de un pool por archivo XML. Las instancias se crean solo cuando
+# hacen falta (hasta ``max_size``) y se reutilizan entre cuadros y sesiones.
+# Los pools viven en el registro de ``recursos``, junto al resto de recursos
+# de OpenCV del proceso (y la precarga de la cascada de caras).
+#
+# Las cascadas Haar de ``cascade_files`` están en el formato antiguo, que
+# OpenCV no puede leer desde memoria (``FileNode``): cada instancia se carga
+# desde disco, pero solo una vez y como mucho ``max_size`` veces por XML.
+
+
+def obtener_pool(ruta, max_size=None):
+    """
+    Pool compartido por todo el proceso para el XML ``ruta``. Uso::
+
+        with pool.prestar() as cascada:
+            caras = cascada.detectMultiScale(gray)
+    """
+    return registrar_cascada(ruta, max_size)
+
+
+def stats_pools():
+    """Métricas de todos los pools de cascadas, por nombre de archivo."""
+    return {nombre: stats for nombre, stats in stats_recursos().items() if nombre.endswith(".xml")}
@@ -0,0 +1,185 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+import streamlit as st
+
+# ======================================================
+# Caché de imágenes subidas (decodificadas)
+# ======================================================
+# Cada movimiento de un slider es un rerun completo de la página, y los
+# capítulos volvían a leer los bytes del archivo, decodificar el JPEG y
+# convertir a RGB cada vez. Aquí la imagen se decodifica una sola vez por
+# contenido (hash de los bytes) y se guardan junto a ella sus variantes
+# (gris, RGB, vistas reducidas), que se calculan la primera vez que se piden.
+#
+# Las entradas se expulsan por LRU cuando el total de bytes supera el
+# presupuesto. Los arreglos se marcan de solo lectura porque se comparten
+# entre reruns y sesiones: quien necesite modificarlos debe copiarlos.
+
+PRESUPUESTO_BYTES = 512 * 1024 * 1024
+ANCHO_VISTA = 1280
+
+
+def _solo_lectura(arreglo):
+    arreglo.setflags(write=False)
+    return arreglo
+
+
+class ImagenDecodificada:
+    """Imagen BGR decodificada y sus variantes, calculadas a demanda."""
+
+    def __init__(self, clave, bgr, cache=None):
+        self.clave = clave
+        self.bgr = _solo_lectura(bgr)
+        self._cache = cache
+        self._variantes = {}
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self):
+        with self._lock:
+            return self.bgr.nbytes + sum(v.nbytes for v in self._variantes.values())
+
+    def _variante(self, nombre, calcular):
+        with self._lock:
+            arreglo = self._variantes.get(nombre)
+        if arreglo is not None:
+            return arreglo
+        arreglo = _solo_lectura(calcular())
+        with self._lock:
+            # Otro hilo pudo calcularla a la vez: se queda la primera
+            existente = self._variantes.get(nombre)
+            if existente is not None:
+                return existente
+            self._variantes[nombre] = arreglo
+        if self._cache is not None:
+            self._cache._crecio(self)
+        return arreglo
+
+    @property
+    def gris(self):
+        return self._variante("gris", lambda: cv2.cvtColor(self.bgr, cv2.COLOR_BGR2GRAY))
+
+    @property
+    def rgb(self):
+        return self._variante("rgb", lambda: cv2.cvtColor(self.bgr, cv2.COLOR_BGR2RGB))
+
+    def proxy(self, ancho_max=ANCHO_VISTA):
+        """BGR reducido a ``ancho_max`` para procesar en la vista previa (o ``bgr`` si ya cabe)."""
+        h, w = self.bgr.shape[:2]
+        if w <= ancho_max:
+            return self.bgr
+
+        def reducir():
+            return cv2.resize(self.bgr, (ancho_max, max(1, round(h * ancho_max / w))),
+                              interpolation=cv2.INTER_AREA)
+
+        return self._variante(f"proxy_{ancho_max}", reducir)
+
+    def factor_proxy(self, ancho_max=ANCHO_VISTA):
+        """Escala del proxy respecto al original, para reescalar parámetros en píxeles."""
+        return self.proxy(ancho_max).shape[1] / self.bgr.shape[1]
+
+    def vista(self, ancho_max=ANCHO_VISTA):
+        """RGB reducido a ``ancho_max`` para mostrar en la página (o ``rgb`` si ya cabe)."""
+        if self.bgr.shape[1] <= ancho_max:
+            return self.rgb
+        return self._variante(f"vista_{ancho_max}",
+                              lambda: cv2.cvtColor(self.proxy(ancho_max), cv2.COLOR_BGR2RGB))
+
+
+class CacheImagenes:
+    """LRU de ``ImagenDecodificada`` por hash del contenido, con presupuesto en bytes."""
+
+    def __init__(self, presupuesto_bytes=PRESUPUESTO_BYTES):
+        self.presupuesto_bytes = presupuesto_bytes
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsadas = 0
+
+    @staticmethod
+    def clave(datos):
+        return hashlib.blake2b(datos, digest_size=16).hexdigest()
+
+    def obtener(self, datos, flags=cv2.IMREAD_COLOR):
+        """Imagen decodificada de ``datos`` (bytes del archivo); None si no es una imagen."""
+        clave = f"{self.clave(datos)}:{flags}"
+        with self._lock:
+            imagen = self._entradas.get(clave)
+            if imagen is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return imagen
+            self.fallos += 1
+
+        bgr = cv2.imdecode(np.frombuffer(datos, dtype=np.uint8), flags)
+        if bgr is None:
+            return None
+        imagen = ImagenDecodificada(clave, bgr, self)
+        with self._lock:
+            # Si otro hilo la decodificó a la vez, se usa la suya
+            existente = self._entradas.get(clave)
+            if existente is not None:
+                self._entradas.move_to_end(clave)
+                return existente
+            self._entradas[clave] = imagen
+            self.bytes += imagen.nbytes
+            self._expulsar()
+        return imagen
+
+    def _crecio(self, imagen):
+        # Una variante nueva cuenta contra el presupuesto de la caché
+        with self._lock:
+            if self._entradas.get(imagen.clave) is imagen:
+                self.bytes = sum(entrada.nbytes for entrada in self._entradas.values())
+                self._expulsar()
+
+    def _expulsar(self):
+        # La entrada más reciente nunca se expulsa, aunque sola supere el presupuesto
+        while self.bytes > self.presupuesto_bytes and len(self._entradas) > 1:
+            _, vieja = self._entradas.popitem(last=False)
+            self.bytes -= vieja.nbytes
+            self.expulsadas += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entradas": len(self._entradas),
+                "mb": self.bytes / 2 ** 20,
+                "presupuesto_mb": self.presupuesto_bytes / 2 ** 20,
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "expulsadas": self.expulsadas,
+            }
+
+
+cache = CacheImagenes()
+
+
+def cargar_imagen(uploaded_file, flags=cv2.IMREAD_COLOR):
+    """
+    ``ImagenDecodificada`` de un archivo de ``st.file_uploader``, compartida
+    por todos los reruns y capítulos que suban el mismo contenido.
+    """
+    return cache.obtener(uploaded_file.getvalue(), flags)
+
+
+def descarga_resolucion_completa(renderizar, nombre_archivo, clave):
+    """
+    Botón que ejecuta ``renderizar()`` (imagen BGR o gris a resolución
+    completa) solo cuando el usuario lo pide, y ofrece el resultado en PNG.
+    La vista previa interactiva nunca paga este costo.
+    """
+    if st.button("🖼️ Preparar descarga a resolución completa", key=f"{clave}_render"):
+        with st.spinner("⏳ Procesando la imagen a resolución completa..."):
+            salida = renderizar()
+            _, png = cv2.imencode(".png", salida)
+        h, w = salida.shape[:2]
+        st.download_button(f"⬇️ Descargar PNG ({w}×{h})", png.tobytes(), file_name=nombre_archivo,
+                           mime="image/png", key=f"{clave}_descarga", on_click="ignore")
@@ -0,0 +1,133 @@
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import av
+import numpy as np
+import streamlit as st
+from streamlit_webrtc import VideoProcessorBase
+
+# ======================================================
+# Procesador base para streams WebRTC
+# ======================================================
+# Reemplaza a ``VideoTransformerBase`` (obsoleto) usando ``recv_queued``:
+# streamlit-webrtc entrega todos los cuadros que llegaron desde la última
+# llamada y solo se procesa el más reciente, descartando los que ya quedaron
+# atrasados en lugar de acumular retraso. Cada cuadro se mide por etapas y se
+# guardan ventanas móviles para mostrar p50/p95 y FPS en la página.
+
+
+class ProcesadorEnVivo(VideoProcessorBase):
+    """
+    Base común de los procesadores en vivo. Las subclases implementan
+    ``procesar_imagen(img)`` (BGR → BGR) y marcan sus etapas con
+    ``with self.etapa("color")``, ``"algoritmo"``, ``"dibujo"``, etc. La
+    decodificación y la codificación del cuadro las mide esta clase.
+    """
+
+    def __init__(self, ventana=120):
+        self._lock = threading.Lock()
+        self._totales = deque(maxlen=ventana)
+        self._etapas = defaultdict(lambda: deque(maxlen=ventana))
+        self._instantes = deque(maxlen=ventana)
+        self._actual = {}
+        self.procesados = 0
+        self.descartados = 0
+
+    def procesar_imagen(self, img):
+        raise NotImplementedError
+
+    @contextmanager
+    def etapa(self, nombre):
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._actual[nombre] = self._actual.get(nombre, 0.0) + time.perf_counter() - inicio
+
+    async def recv_queued(self, frames):
+        # Solo vale la pena procesar el cuadro más reciente
+        frame = frames[-1]
+        inicio = time.perf_counter()
+        self._actual = {}
+        with self.etapa("decodificar"):
+            img = frame.to_ndarray(format="bgr24")
+        salida = self.procesar_imagen(img)
+        with self.etapa("codificar"):
+            nuevo = av.VideoFrame.from_ndarray(salida, format="bgr24")
+        fin = time.perf_counter()
+
+        with self._lock:
+            self.descartados += len(frames) - 1
+            self.procesados += 1
+            self._totales.append(fin - inicio)
+            self._instantes.append(fin)
+            for nombre, duracion in self._actual.items():
+                self._etapas[nombre].append(duracion)
+        return [nuevo]
+
+    def metricas(self):
+        """FPS logrados y latencias p50/p95 (ms) del total y de cada etapa."""
+        with self._lock:
+            totales = list(self._totales)
+            instantes = list(self._instantes)
+            etapas = {nombre: list(valores) for nombre, valores in self._etapas.items()}
+            procesados, descartados = self.procesados, self.descartados
+
+        fps = 0.0
+        if len(instantes) > 1 and instantes[-1] > instantes[0]:
+            fps = (len(instantes) - 1) / (instantes[-1] - instantes[0])
+
+        def percentiles(valores):
+            if not valores:
+                return 0.0, 0.0
+            p50, p95 = np.percentile(valores, [50, 95])
+            return 1000 * float(p50), 1000 * float(p95)
+
+        return {
+            "fps": fps,
+            "procesados": procesados,
+            "descartados": descartados,
+            "total": percentiles(totales),
+            "etapas": {nombre: percentiles(valores) for nombre, valores in etapas.items()},
+        }
+
+
+class ProcesadorDelegado(ProcesadorEnVivo):
+    """
+    Procesador en vivo que delega cada cuadro en ``motor.procesar(img, etapa)``.
+    Sirve para motores que no dependen de streamlit-webrtc (se pueden usar y
+    medir sin él); la página ajusta ``ctx.video_processor.motor`` en caliente.
+    """
+
+    def __init__(self, motor):
+        super().__init__()
+        self.motor = motor
+
+    def procesar_imagen(self, img):
+        return self.motor.procesar(img, self.etapa)
+
+
+def mostrar_metricas(ctx, cada="1s"):
+    """
+    Muestra las métricas del procesador de ``ctx`` (el contexto que devuelve
+    ``webrtc_streamer``) y las refresca cada ``cada`` sin rerun de la página.
+    """
+    @st.fragment(run_every=cada)
+    def _panel():
+        procesador = ctx.video_processor
+        if procesador is None:
+            st.caption("📊 Las métricas aparecen cuando el stream está activo.")
+            return
+        m = procesador.metricas()
+        columnas = st.columns(4)
+        columnas[0].metric("FPS", f"{m['fps']:.1f}")
+        columnas[1].metric("Latencia p50", f"{m['total'][0]:.1f} ms")
+        columnas[2].metric("Latencia p95", f"{m['total'][1]:.1f} ms")
+        columnas[3].metric("Cuadros descartados", m["descartados"])
+        st.table([{"etapa": nombre, "p50 ms": round(p50, 2), "p95 ms": round(p95, 2)}
+                  for nombre, (p50, p95) in m["etapas"].items()])
+
+    with st.expander("📊 Rendimiento del stream", expanded=True):
+        _panel()
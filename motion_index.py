@@ -0,0 +1,160 @@
+import os
+
+import cv2
+import numpy as np
+
+# ======================================================
+# Índice de movimiento por cuadro
+# ======================================================
+# Mientras se procesa un video se guarda, por cada cuadro, una puntuación de
+# movimiento, el número de píxeles en primer plano y las cajas de las regiones
+# que se mueven. El índice se guarda en un .npz junto al video, de modo que
+# consultas como "cuadros con movimiento" no necesitan volver a decodificar ni
+# procesar el archivo: se salta directamente a los cuadros encontrados.
+
+
+def ruta_indice(ruta_video):
+    """Ruta del índice de movimiento asociado a un video."""
+    return os.path.splitext(ruta_video)[0] + ".motion.npz"
+
+
+class MotionIndexBuilder:
+    """
+    Acumula el índice cuadro a cuadro a partir de la máscara binaria de
+    primer plano (0/255) de un método de movimiento, la tercera salida de
+    ``capitulo8.crear_procesador``. ``escala`` es el factor con el que
+    se redujeron los cuadros antes de procesarlos; las cajas se guardan en
+    coordenadas del video original.
+    """
+
+    def __init__(self, fps=30.0, escala=1.0, area_minima=50):
+        self.fps = fps
+        self.escala = escala
+        self.area_minima = area_minima
+        self.cuadros = []
+        self.puntuaciones = []
+        self.pixeles = []
+        self.n_cajas = []
+        self.cajas = []
+
+    def agregar(self, cuadro, mascara):
+        if mascara.ndim != 2:
+            raise ValueError("agregar espera la máscara binaria de primer plano, no la imagen de resultado")
+        pixeles = cv2.countNonZero(mascara)
+
+        cajas = np.empty((0, 4), dtype=np.int32)
+        if pixeles:
+            _, _, stats, _ = cv2.connectedComponentsWithStats(mascara, connectivity=8)
+            stats = stats[1:]  # La etiqueta 0 es el fondo
+            stats = stats[stats[:, cv2.CC_STAT_AREA] >= self.area_minima, :4]
+            cajas = np.round(stats / self.escala).astype(np.int32)
+
+        self.cuadros.append(cuadro)
+        self.puntuaciones.append(pixeles / mascara.size)
+        self.pixeles.append(round(pixeles / (self.escala * self.escala)))
+        self.n_cajas.append(len(cajas))
+        self.cajas.append(cajas)
+
+    def construir(self):
+        return MotionIndex(
+            cuadros=np.array(self.cuadros, dtype=np.int32),
+            puntuaciones=np.array(self.puntuaciones, dtype=np.float32),
+            pixeles=np.array(self.pixeles, dtype=np.int32),
+            inicio_cajas=np.concatenate([[0], np.cumsum(self.n_cajas)]).astype(np.int32),
+            cajas=(np.concatenate(self.cajas) if self.cajas else np.empty((0, 4))).astype(np.int32),
+            fps=self.fps,
+        )
+
+
+class MotionIndex:
+    """
+    Índice de movimiento en arreglos NumPy. Las cajas de todos los cuadros
+    se guardan juntas; las del i-ésimo cuadro indexado son
+    ``cajas[inicio_cajas[i]:inicio_cajas[i + 1]]`` como ``(x, y, w, h)``.
+    """
+
+    def __init__(self, cuadros, puntuaciones, pixeles, inicio_cajas, cajas, fps=30.0):
+        self.cuadros = cuadros
+        self.puntuaciones = puntuaciones
+        self.pixeles = pixeles
+        self.inicio_cajas = inicio_cajas
+        self.cajas = cajas
+        self.fps = float(fps)
+
+    def __len__(self):
+        return len(self.cuadros)
+
+    def guardar(self, ruta):
+        np.savez_compressed(ruta, cuadros=self.cuadros, puntuaciones=self.puntuaciones,
+                            pixeles=self.pixeles, inicio_cajas=self.inicio_cajas,
+                            cajas=self.cajas, fps=np.float32(self.fps))
+
+    @classmethod
+    def cargar(cls, ruta):
+        with np.load(ruta) as datos:
+            return cls(datos["cuadros"], datos["puntuaciones"], datos["pixeles"],
+                       datos["inicio_cajas"], datos["cajas"], float(datos["fps"]))
+
+    # ------------------------------
+    # Consultas
+    # ------------------------------
+    def cuadros_con_movimiento(self, puntuacion_minima=0.001, pixeles_minimos=0):
+        """Números de cuadro cuya puntuación y píxeles superan los umbrales."""
+        seleccion = (self.puntuaciones >= puntuacion_minima) & (self.pixeles >= pixeles_minimos)
+        return self.cuadros[seleccion]
+
+    def segmentos(self, cuadros, separacion_maxima=1):
+        """Agrupa cuadros en tramos ``(inicio, fin)`` sin huecos mayores a ``separacion_maxima``."""
+        if len(cuadros) == 0:
+            return []
+        cortes = np.flatnonzero(np.diff(cuadros) > separacion_maxima)
+        inicios = np.r_[cuadros[0], cuadros[cortes + 1]]
+        fines = np.r_[cuadros[cortes], cuadros[-1]]
+        return list(zip(inicios.tolist(), fines.tolist()))
+
+    def cajas_de(self, cuadro):
+        """Cajas ``(x, y, w, h)`` del cuadro indicado (vacío si no está indexado)."""
+        i = np.searchsorted(self.cuadros, cuadro)
+        if i >= len(self.cuadros) or self.cuadros[i] != cuadro:
+            return np.empty((0, 4), dtype=np.int32)
+        return self.cajas[self.inicio_cajas[i]:self.inicio_cajas[i + 1]]
+
+    def tiempo_de(self, cuadro):
+        return cuadro / self.fps
+
+
+def leer_cuadros(ruta_video, cuadros):
+    """
+    Devuelve ``(cuadro, imagen)`` para los números de cuadro pedidos (en
+    orden creciente), saltando con ``CAP_PROP_POS_FRAMES`` solo cuando no son
+    consecutivos en lugar de decodificar todo el video.
+    """
+    cap = cv2.VideoCapture(ruta_video)
+    siguiente = None
+    try:
+        for cuadro in sorted(int(c) for c in cuadros):
+            if cuadro != siguiente:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, cuadro)
+            ret, imagen = cap.read()
+            if not ret:
+                break
+            siguiente = cuadro + 1
+            yield cuadro, imagen
+    finally:
+        cap.release()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Consulta el índice de movimiento de un video.")
+    parser.add_argument("video")
+    parser.add_argument("--minimo", type=float, default=0.001,
+                        help="Fracción mínima de píxeles en movimiento")
+    args = parser.parse_args()
+
+    indice = MotionIndex.cargar(ruta_indice(args.video))
+    cuadros = indice.cuadros_con_movimiento(puntuacion_minima=args.minimo)
+    print(f"{len(cuadros)} de {len(indice)} cuadros con movimiento")
+    for inicio, fin in indice.segmentos(cuadros, separacion_maxima=int(indice.fps // 2)):
+        print(f"  cuadros {inicio}-{fin} ({indice.tiempo_de(inicio):.1f}-{indice.tiempo_de(fin):.1f} s)")
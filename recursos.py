@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
+
+import cv2
+
+# ======================================================
+# Registro de recursos de OpenCV por proceso
+# ======================================================
+# Detectores, comparadores y cascadas se crean una sola vez por proceso del
+# servidor y se reutilizan entre reruns, sesiones y espectadores. Cada recurso
+# es un pool: los objetos de OpenCV no son seguros para usar desde varios
+# hilos a la vez, así que cada hilo toma prestada su propia instancia (se
+# crean solo cuando hacen falta, hasta ``max_size``).
+#
+# Vive a nivel de módulo, como ``st.cache_resource``, pero sin depender de
+# Streamlit: también lo usan los hilos de streamlit-webrtc y los benchmarks.
+
+RUTA_CASCADAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "cascade_files")
+
+
+class PoolRecursos:
+    """
+    Pool de instancias creadas con ``fabrica()``. Uso::
+
+        with pool.prestar() as sift:
+            kp, des = sift.detectAndCompute(gray, None)
+
+    Si todas las instancias están ocupadas y el pool ya llegó a ``max_size``,
+    el hilo espera a que se libere una; ese tiempo se acumula en ``stats()``.
+    """
+
+    def __init__(self, nombre, fabrica, max_size=None):
+        self.nombre = nombre
+        self.fabrica = fabrica
+        self.max_size = max_size or os.cpu_count() or 1
+        self._libres = []
+        self._cond = threading.Condition()
+        self.creados = 0
+        self.prestamos = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self.carga_total = 0.0
+
+    def _crear(self):
+        inicio = time.perf_counter()
+        recurso = self.fabrica()
+        with self._cond:
+            self.carga_total += time.perf_counter() - inicio
+        return recurso
+
+    @contextmanager
+    def prestar(self):
+        inicio = time.perf_counter()
+        with self._cond:
+            while not self._libres and self.creados >= self.max_size:
+                self._cond.wait()
+            recurso = self._libres.pop() if self._libres else None
+            if recurso is None:
+                self.creados += 1
+            espera = time.perf_counter() - inicio
+            self.prestamos += 1
+            self.espera_total += espera
+            self.espera_max = max(self.espera_max, espera)
+
+        if recurso is None:
+            try:
+                recurso = self._crear()
+            except Exception:
+                with self._cond:
+                    self.creados -= 1
+                    self._cond.notify()
+                raise
+        try:
+            yield recurso
+        finally:
+            with self._cond:
+                self._libres.append(recurso)
+                self._cond.notify()
+
+    def precalentar(self):
+        """Deja una instancia lista si el pool todavía está vacío."""
+        with self._cond:
+            vacio = self.creados == 0
+        if vacio:
+            with self.prestar():
+                pass
+
+    def stats(self):
+        with self._cond:
+            return {
+                "tamano": self.creados,
+                "libres": len(self._libres),
+                "max_size": self.max_size,
+                "prestamos": self.prestamos,
+                "espera_media_ms": 1000 * self.espera_total / max(self.prestamos, 1),
+                "espera_max_ms": 1000 * self.espera_max,
+                "carga_ms": 1000 * self.carga_total,
+            }
+
+
+def cargar_cascada(ruta):
+    cascada = cv2.CascadeClassifier(ruta)
+    if cascada.empty():
+        raise IOError(f"No se pudo cargar la cascada: {ruta}")
+    return cascada
+
+
+_registro = {}
+_registro_lock = threading.Lock()
+
+
+def registrar(nombre, fabrica, max_size=None):
+    """Pool del proceso para ``nombre``; lo crea (vacío) la primera vez."""
+    with _registro_lock:
+        pool = _registro.get(nombre)
+        if pool is None:
+            pool = _registro[nombre] = PoolRecursos(nombre, fabrica, max_size)
+        return pool
+
+
+def registrar_cascada(ruta, max_size=None):
+    """Pool de la cascada ``ruta``, registrado con el nombre del archivo XML."""
+    return registrar(os.path.basename(ruta), partial(cargar_cascada, ruta), max_size)
+
+
+def prestar(nombre):
+    """Atajo para ``with recursos.prestar("SIFT") as sift: ...``."""
+    with _registro_lock:
+        pool = _registro[nombre]
+    return pool.prestar()
+
+
+def stats_recursos():
+    """Métricas de todos los recursos registrados, por nombre."""
+    with _registro_lock:
+        pools = list(_registro.values())
+    return {pool.nombre: pool.stats() for pool in pools}
+
+
+# Recursos comunes de los capítulos; ninguno se construye hasta que se usa
+registrar("SIFT", cv2.SIFT_create)
+registrar("BFMatcher L2", partial(cv2.BFMatcher, cv2.NORM_L2, crossCheck=True))
+registrar("FAST", cv2.FastFeatureDetector_create)
+registrar("ORB", cv2.ORB_create)
+registrar_cascada(os.path.join(RUTA_CASCADAS, "haarcascade_frontalface_alt.xml"))
+
+# Lo que conviene tener listo antes del primer uso: la cascada de caras tarda
+# decenas de ms en leerse, los detectores son casi gratis pero así la primera
+# comparación no paga la inicialización perezosa de OpenCV
+PRECARGA = ["haarcascade_frontalface_alt.xml", "SIFT", "BFMatcher L2", "FAST", "ORB"]
+
+_precarga = {"hilo": None, "inicio": None, "fin": None}
+
+
+def precalentar(nombres=None):
+    """
+    Construye una instancia de cada recurso de ``nombres`` (por defecto
+    ``PRECARGA``) en un hilo de fondo. Solo la primera llamada del proceso
+    arranca el hilo; las siguientes devuelven el mismo.
+    """
+    nombres = list(PRECARGA if nombres is None else nombres)
+
+    def _trabajo():
+        for nombre in nombres:
+            try:
+                with _registro_lock:
+                    pool = _registro[nombre]
+                pool.precalentar()
+            except Exception:
+                # Un recurso que no se puede cargar falla igual al usarlo;
+                # la precarga no debe tumbar el resto
+                pass
+        _precarga["fin"] = time.perf_counter()
+
+    with _registro_lock:
+        if _precarga["hilo"] is None:
+            _precarga["inicio"] = time.perf_counter()
+            _precarga["hilo"] = threading.Thread(target=_trabajo, name="precarga-recursos", daemon=True)
+            _precarga["hilo"].start()
+        return _precarga["hilo"]
+
+
+def estado_precarga():
+    """``None`` si no se lanzó, ``"en curso"`` o los ms que tardó la precarga."""
+    if _precarga["inicio"] is None:
+        return None
+    if _precarga["fin"] is None:
+        return "en curso"
+    return 1000 * (_precarga["fin"] - _precarga["inicio"])
@@ -0,0 +1,68 @@
+"""
+Procesamiento por lotes del Capítulo 8: el CSV y ``mascara.avi`` cuentan el
+primer plano binario de cada método, así que un clip estático con ruido de
+sensor no tiene actividad.
+
+Uso:
+    python -m pytest tests
+"""
+import csv
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import batch_video  # noqa: E402
+
+W, H = 320, 240
+
+
+def fondo(seed=0):
+    rng = np.random.default_rng(seed)
+    return cv2.resize(rng.integers(120, 200, (H // 20, W // 20, 3), dtype=np.uint8), (W, H),
+                      interpolation=cv2.INTER_CUBIC)
+
+
+def test_lote_clip_estatico_con_ruido(tmp_path):
+    # Video estático con ruido de sensor (σ ≈ 3): no hay movimiento real
+    rng = np.random.default_rng(1)
+    base = fondo().astype(np.int16)
+    ruta = str(tmp_path / "estatico.avi")
+    writer = cv2.VideoWriter(ruta, cv2.VideoWriter_fourcc(*"FFV1"), 30, (W, H))
+    for _ in range(40):
+        ruido = rng.normal(0, 3, base.shape).round().astype(np.int16)
+        writer.write(np.clip(base + ruido, 0, 255).astype(np.uint8))
+    writer.release()
+
+    for metodo in ("diferencia", "mog2"):
+        salida = tmp_path / metodo
+        batch_video.procesar_archivo(ruta, metodo, str(salida))
+        with open(salida / "estatico" / "resultados.csv") as f:
+            filas = list(csv.DictReader(f))
+        fracciones = [float(fila["fraccion_activa"]) for fila in filas[10:]]
+        assert max(fracciones) < 0.001, metodo
+
+        mascaras = cv2.VideoCapture(str(salida / "estatico" / "mascara.avi"))
+        ok, cuadro = mascaras.read()
+        mascaras.release()
+        assert ok and set(np.unique(cuadro)) <= {0, 255}
+
+
+def test_gmg_sin_contrib_falla_antes_de_empezar(tmp_path):
+    if hasattr(cv2, "bgsegm"):
+        batch_video.validar_metodo("gmg")
+        return
+    with pytest.raises(ValueError, match="bgsegm"):
+        batch_video.procesar_lote(["no_existe.mp4"], "gmg", str(tmp_path))
+    assert not any(tmp_path.iterdir())
+
+
+def test_videos_con_el_mismo_nombre_no_comparten_carpeta(tmp_path):
+    assert batch_video.nombres_salida(["a/clip.mp4", "b/clip.mp4", "c/otro.mp4"]) == \
+        [os.path.join("a", "clip"), os.path.join("b", "clip"), "otro"]
+    with pytest.raises(ValueError, match="misma carpeta"):
+        batch_video.nombres_salida(["a/clip.mp4", "a/clip.avi"])
@@ -0,0 +1,113 @@
+"""
+Seam carving: las versiones vectorizadas deben dar exactamente lo mismo que
+la original con bucles, la energía incremental lo mismo que el recálculo
+completo y el índice de seams lo mismo que el tallado que representa.
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import capitulo6  # noqa: E402
+
+
+# Implementación original basada en bucles de Python (referencia)
+def find_vertical_seam_loop(img, energy):
+    rows, cols = img.shape[:2]
+    seam = np.zeros(rows)
+
+    dist_to = np.zeros((rows, cols)) + float('inf')
+    dist_to[0, :] = np.zeros(cols)
+    edge_to = np.zeros((rows, cols))
+
+    for row in range(rows - 1):
+        for col in range(cols):
+            if col != 0 and dist_to[row+1, col-1] > dist_to[row, col] + energy[row+1, col-1]:
+                dist_to[row+1, col-1] = dist_to[row, col] + energy[row+1, col-1]
+                edge_to[row+1, col-1] = 1
+
+            if dist_to[row+1, col] > dist_to[row, col] + energy[row+1, col]:
+                dist_to[row+1, col] = dist_to[row, col] + energy[row+1, col]
+                edge_to[row+1, col] = 0
+
+            if col != cols-1 and dist_to[row+1, col+1] > dist_to[row, col] + energy[row+1, col+1]:
+                dist_to[row+1, col+1] = dist_to[row, col] + energy[row+1, col+1]
+                edge_to[row+1, col+1] = -1
+
+    seam[rows-1] = np.argmin(dist_to[rows-1, :])
+    for i in (x for x in reversed(range(rows)) if x > 0):
+        seam[i-1] = seam[i] + edge_to[i, int(seam[i])]
+    return seam
+
+
+def remove_vertical_seam_loop(img, seam):
+    rows, cols = img.shape[:2]
+    for row in range(rows):
+        for col in range(int(seam[row]), cols - 1):
+            img[row, col] = img[row, col + 1]
+    img = img[:, 0:cols - 1]
+    return img
+
+
+def imagen_suave(width=300, height=200, seed=0):
+    rng = np.random.default_rng(seed)
+    img = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    return cv2.GaussianBlur(img, (0, 0), 3)
+
+
+def test_lote_numerado_por_costo():
+    img = imagen_suave()
+    energy = capitulo6.compute_energy_matrix(img)
+    dist_to, _ = capitulo6.cumulative_energy(energy)
+    seams = capitulo6.find_vertical_seams(energy, 5)
+    costos = dist_to[seams[:, -1]]
+    assert np.all(np.diff(costos) >= 0)
+
+    # Con un prefijo que corta el lote se eliminan los seams más baratos
+    seam_order = capitulo6.build_seam_index(img, 5, batch_size=5)
+    filas = np.arange(img.shape[0])
+    for iteracion, seam in enumerate(seams):
+        assert np.all(seam_order[filas, seam] == iteracion)
+
+
+def test_seam_igual_a_version_original(seams=5):
+    img = imagen_suave(120, 90, seed=1)
+    for _ in range(seams):
+        energy = capitulo6.compute_energy_matrix(img)
+        seam = capitulo6.find_vertical_seam(energy)
+        referencia = find_vertical_seam_loop(img, energy)
+        assert np.array_equal(seam, referencia)
+        reducida = capitulo6.remove_vertical_seam(img, seam)
+        assert np.array_equal(reducida, remove_vertical_seam_loop(img.copy(), referencia))
+        img = reducida
+
+
+@pytest.mark.parametrize("width", [16, 64, 333])
+def test_energia_incremental_identica(width, seams=40):
+    img = imagen_suave(width, seed=width)
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    energy = capitulo6.compute_energy_from_gray(gray)
+    for _ in range(min(seams, width - 3)):
+        seam = capitulo6.find_vertical_seam(energy)
+        img = capitulo6.remove_vertical_seam(img, seam)
+        gray, energy = capitulo6.update_energy_matrix(gray, energy, seam)
+        assert np.array_equal(energy, capitulo6.compute_energy_matrix(img))
+
+
+def test_indice_equivale_al_tallado_secuencial(max_seams=30):
+    img = imagen_suave(200, 150, seed=2)
+    seam_order = capitulo6.build_seam_index(img, max_seams)
+    for n in (0, 1, 7, max_seams):
+        esperado = img
+        for _ in range(n):
+            seam = capitulo6.find_vertical_seam(capitulo6.compute_energy_matrix(esperado))
+            esperado = capitulo6.remove_vertical_seam(esperado, seam)
+        resultado, _ = capitulo6.apply_seam_index(img, seam_order, n)
+        assert np.array_equal(resultado, esperado)
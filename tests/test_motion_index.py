@@ -0,0 +1,94 @@
+"""
+La máscara que se indexa es el primer plano binario de cada método, no la
+imagen de resultado: los objetos oscuros cuentan y las sombras de MOG2 no.
+
+Uso:
+    python -m pytest tests
+"""
+import os
+import sys
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import capitulo8  # noqa: E402
+from motion_index import MotionIndexBuilder  # noqa: E402
+
+W, H = 320, 240
+LADO = (40, 30)  # ancho × alto del objeto: 1200 px
+
+
+def fondo(seed=0):
+    rng = np.random.default_rng(seed)
+    base = cv2.resize(rng.integers(120, 200, (H // 20, W // 20, 3), dtype=np.uint8), (W, H),
+                      interpolation=cv2.INTER_CUBIC)
+    return base
+
+
+def indexar(metodo, frames):
+    procesador = capitulo8.crear_procesador(metodo)
+    indice = MotionIndexBuilder()
+    for numero, frame in enumerate(frames):
+        resultado = procesador(frame)
+        if resultado is not None:
+            indice.agregar(numero, resultado[2])
+    return indice.construir()
+
+
+def clip_objeto_oscuro(n=60, aparece=40, paso=6):
+    base = fondo()
+    frames = []
+    for i in range(n):
+        frame = base.copy()
+        if i >= aparece:
+            x = 20 + paso * (i - aparece)
+            cv2.rectangle(frame, (x, 100), (x + LADO[0] - 1, 100 + LADO[1] - 1), (15, 15, 15), -1)
+        frames.append(frame)
+    return frames
+
+
+def test_mog2_indexa_objeto_oscuro():
+    indice = indexar("Sustracción de Fondo (MOG2)", clip_objeto_oscuro())
+    ultimo = indice.pixeles[-1]
+    assert 0.8 * LADO[0] * LADO[1] <= ultimo <= 1.2 * LADO[0] * LADO[1]
+    assert indice.inicio_cajas[-1] - indice.inicio_cajas[-2] >= 1
+
+
+def test_diferencia_indexa_objeto_oscuro():
+    # La diferencia de tres cuadros marca el objeto actual cuando se desplaza
+    # más que su ancho entre cuadros
+    indice = indexar("Diferencia de Cuadros (Movimiento)", clip_objeto_oscuro(n=46, paso=45))
+    assert 0.8 * LADO[0] * LADO[1] <= indice.pixeles[-1] <= 2.2 * LADO[0] * LADO[1]
+    assert indice.inicio_cajas[-1] - indice.inicio_cajas[-2] >= 1
+
+
+def test_mog2_ignora_sombras():
+    base = fondo()
+    frames = [base.copy() for _ in range(40)]
+    # Una sombra: el mismo fondo oscurecido al 70 %, sin objeto encima
+    sombra = base.copy()
+    sombra[80:160, 100:220] = (sombra[80:160, 100:220] * 0.7).astype(np.uint8)
+    frames.append(sombra)
+
+    procesador = capitulo8.crear_procesador("Sustracción de Fondo (MOG2)")
+    for frame in frames[:-1]:
+        procesador(frame)
+    bg = cv2.createBackgroundSubtractorMOG2()
+    for frame in frames[:-1]:
+        bg.apply(frame, learningRate=0.01)
+    # La máscara cruda de MOG2 sí marca la sombra (127)...
+    assert np.count_nonzero(bg.apply(frames[-1], learningRate=0.01) == 127) > 0
+    # ...pero el primer plano que se indexa no
+    _, _, mascara = procesador(frames[-1])
+    assert cv2.countNonZero(mascara) == 0
+
+
+def test_color_devuelve_mascara_binaria():
+    frame = fondo()
+    cv2.rectangle(frame, (50, 50), (89, 79), (255, 60, 0), -1)
+    _, _, mascara = capitulo8.crear_procesador("Detección de Color (Azul)")(frame)
+    assert set(np.unique(mascara)) <= {0, 255}
+    assert cv2.countNonZero(mascara) >= LADO[0] * LADO[1]
+
@@ -0,0 +1,279 @@
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+import cv2
+import numpy as np
+
+# ======================================================
+# Pipeline de video: captura → procesamiento → visualización
+# ======================================================
+# La lectura del video y el procesamiento corren en hilos propios y se
+# comunican con colas acotadas; la visualización corre en el hilo que llama
+# a ``run`` (el del script de Streamlit, que es el único que puede escribir
+# en la página) y se limita a ``target_fps`` en lugar de un sleep fijo.
+# Con un ``DisplaySink`` la tubería corre sin pausas (``target_fps=0``) y es
+# el sink quien decide qué cuadros llegan a la página.
+
+_FIN = object()
+
+
+class FrameContext:
+    """
+    Buffers preasignados para el lazo de procesamiento, pensados para el
+    argumento ``dst=`` de OpenCV y así evitar reservar memoria en cada cuadro.
+
+    - ``trabajo(nombre, shape)``: un único buffer reutilizado en cada cuadro,
+      para resultados intermedios que no salen de la función.
+    - ``salida(nombre, shape)``: un anillo de ``n_salidas`` buffers; se avanza
+      con ``siguiente()`` una vez por cuadro. El anillo debe ser mayor que el
+      número de resultados que siguen en uso cuando llega el cuadro siguiente.
+      Si el resultado se consume en el mismo hilo antes de eso (por ejemplo,
+      ``DisplaySink.preparar`` lo codifica ahí mismo) basta ``n_salidas=1``;
+      cada slot de más solo ocupa memoria.
+    """
+
+    def __init__(self, n_salidas=8):
+        self.n_salidas = n_salidas
+        self.slot = 0
+        self._trabajo = {}
+        self._salidas = {}
+
+    def trabajo(self, nombre, shape, dtype=np.uint8):
+        buf = self._trabajo.get(nombre)
+        if buf is None or buf.shape != tuple(shape) or buf.dtype != dtype:
+            buf = self._trabajo[nombre] = np.empty(shape, dtype)
+        return buf
+
+    def salida(self, nombre, shape, dtype=np.uint8):
+        ring = self._salidas.setdefault(nombre, [None] * self.n_salidas)
+        buf = ring[self.slot]
+        if buf is None or buf.shape != tuple(shape) or buf.dtype != dtype:
+            buf = ring[self.slot] = np.empty(shape, dtype)
+        return buf
+
+    def siguiente(self):
+        self.slot = (self.slot + 1) % self.n_salidas
+
+
+class _SinBuffers:
+    """Contexto nulo: OpenCV reserva una salida nueva en cada llamada."""
+
+    def trabajo(self, nombre, shape, dtype=np.uint8):
+        return None
+
+    def salida(self, nombre, shape, dtype=np.uint8):
+        return None
+
+    def siguiente(self):
+        pass
+
+
+SIN_BUFFERS = _SinBuffers()
+
+
+def sin_medir(nombre):
+    """Reemplazo de ``ProcesadorEnVivo.etapa`` cuando no hay nada que medir."""
+    return nullcontext()
+
+
+class DisplaySink:
+    """
+    Salida de video hacia la página con frecuencia limitada.
+
+    ``preparar(imagenes)`` se llama en el hilo de procesamiento: si todavía no
+    toca actualizar la página descarta el cuadro (sin codificarlo); si toca,
+    reduce cada imagen a ``ancho_max`` y la codifica una sola vez a JPEG.
+    ``mostrar(datos)`` corre en el hilo de Streamlit y solo envía los bytes ya
+    codificados, sin conversión a RGB ni recodificación. Así el procesamiento
+    no queda atado al ancho de banda del websocket.
+    """
+
+    def __init__(self, placeholders, captions, max_fps=15, ancho_max=640, calidad=80):
+        self.placeholders = placeholders
+        self.captions = captions
+        self.periodo = 1.0 / max_fps if max_fps else 0.0
+        self.ancho_max = ancho_max
+        self.calidad = calidad
+        self._ultimo = None
+        self.preparados = 0
+        self.descartados = 0
+        self.mostrados = 0
+        self.tiempo_codificacion = 0.0
+
+    def preparar(self, imagenes):
+        ahora = time.perf_counter()
+        if self._ultimo is not None and ahora - self._ultimo < self.periodo:
+            self.descartados += 1
+            return None
+        self._ultimo = ahora
+
+        datos = [self._codificar(imagen) for imagen in imagenes]
+        self.tiempo_codificacion += time.perf_counter() - ahora
+        self.preparados += 1
+        return datos
+
+    def _codificar(self, imagen):
+        h, w = imagen.shape[:2]
+        if w > self.ancho_max:
+            alto = max(1, round(h * self.ancho_max / w))
+            imagen = cv2.resize(imagen, (self.ancho_max, alto), interpolation=cv2.INTER_AREA)
+        ok, buf = cv2.imencode(".jpg", imagen, [cv2.IMWRITE_JPEG_QUALITY, self.calidad])
+        return buf.tobytes()
+
+    def mostrar(self, datos):
+        for placeholder, jpeg, caption in zip(self.placeholders, datos, self.captions):
+            placeholder.image(jpeg, caption=caption, use_container_width=True)
+        self.mostrados += 1
+
+    def stats(self):
+        return {
+            "mostrados": self.mostrados,
+            "descartados_pantalla": self.descartados,
+            "codificacion_ms": 1000 * self.tiempo_codificacion / max(self.preparados, 1),
+        }
+
+
+class FrameQueue:
+    """
+    Cola acotada entre dos etapas. Con ``drop_oldest`` una cola llena descarta
+    el cuadro más antiguo (prioriza latencia, ideal para cámara); sin él, el
+    productor espera (no se pierde ningún cuadro, ideal para archivos).
+    """
+
+    def __init__(self, maxsize=4, drop_oldest=True):
+        self.maxsize = maxsize
+        self.drop_oldest = drop_oldest
+        self.dropped = 0
+        self._items = deque()
+        self._cond = threading.Condition()
+
+    def put(self, item, stop_event):
+        with self._cond:
+            while len(self._items) >= self.maxsize and item is not _FIN:
+                if self.drop_oldest:
+                    self._items.popleft()
+                    self.dropped += 1
+                    break
+                if stop_event.is_set():
+                    return
+                self._cond.wait(0.1)
+            self._items.append(item)
+            self._cond.notify_all()
+
+    def get(self, stop_event):
+        with self._cond:
+            while not self._items:
+                if stop_event.is_set():
+                    return _FIN
+                self._cond.wait(0.1)
+            item = self._items.popleft()
+            self._cond.notify_all()
+            return item
+
+
+class VideoPipeline:
+    """
+    Ejecuta ``procesador(frame)`` sobre los cuadros de ``cap`` y entrega cada
+    resultado a ``mostrar(resultado)``. Si el procesador devuelve ``None`` el
+    cuadro no se muestra (p. ej. mientras se llena el historial). Durante la
+    llamada, ``cuadro_actual`` contiene el número de cuadro en el video, que
+    sigue siendo correcto aunque se descarten cuadros.
+    """
+
+    def __init__(self, cap, procesador, mostrar, target_fps=30.0,
+                 queue_size=4, drop_oldest=True):
+        self.cap = cap
+        self.procesador = procesador
+        self.mostrar = mostrar
+        self.target_fps = target_fps
+        self.frames = FrameQueue(queue_size, drop_oldest)
+        self.results = FrameQueue(queue_size, drop_oldest)
+        self.stop_event = threading.Event()
+        self.error = None
+        self.decoded = 0
+        self.processed = 0
+        self.displayed = 0
+        self.cuadro_actual = -1
+
+    # ------------------------------
+    # Etapas
+    # ------------------------------
+    def _decodificar(self):
+        try:
+            while not self.stop_event.is_set() and self.cap.isOpened():
+                ret, frame = self.cap.read()
+                if not ret:
+                    break
+                self.frames.put((self.decoded, frame), self.stop_event)
+                self.decoded += 1
+        except Exception as exc:
+            self.error = exc
+        finally:
+            self.frames.put(_FIN, self.stop_event)
+
+    def _procesar(self):
+        try:
+            while not self.stop_event.is_set():
+                item = self.frames.get(self.stop_event)
+                if item is _FIN:
+                    break
+                self.cuadro_actual, frame = item
+                resultado = self.procesador(frame)
+                self.processed += 1
+                if resultado is not None:
+                    self.results.put(resultado, self.stop_event)
+        except Exception as exc:
+            self.error = exc
+        finally:
+            self.results.put(_FIN, self.stop_event)
+
+    def run(self):
+        """Arranca los hilos y muestra resultados hasta que termine el video."""
+        hilos = [threading.Thread(target=self._decodificar, daemon=True),
+                 threading.Thread(target=self._procesar, daemon=True)]
+        for hilo in hilos:
+            hilo.start()
+
+        periodo = 1.0 / self.target_fps if self.target_fps else 0.0
+        siguiente = time.perf_counter()
+        try:
+            while True:
+                resultado = self.results.get(self.stop_event)
+                if resultado is _FIN:
+                    break
+                # Solo se espera lo que falta para el siguiente cuadro
+                espera = siguiente - time.perf_counter()
+                if espera > 0:
+                    time.sleep(espera)
+                siguiente = max(siguiente + periodo, time.perf_counter())
+                self.mostrar(resultado)
+                self.displayed += 1
+        finally:
+            self.stop()
+            for hilo in hilos:
+                hilo.join(timeout=1.0)
+
+        if self.error is not None:
+            raise self.error
+        return self.stats()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def stats(self):
+        return {
+            "decodificados": self.decoded,
+            "procesados": self.processed,
+            "mostrados": self.displayed,
+            "descartados": self.frames.dropped + self.results.dropped,
+        }
+
+
+def formatear_stats(stats):
+    """Resumen de una ejecución de ``VideoPipeline`` + ``DisplaySink`` para la página."""
+    return (f"⏱️ {stats['procesados']} cuadros procesados · {stats['mostrados']} mostrados · "
+            f"{stats['descartados_pantalla']} omitidos en pantalla · "
+            f"{stats['descartados']} descartados en cola · "
+            f"codificación JPEG {stats['codificacion_ms']:.1f} ms/cuadro")